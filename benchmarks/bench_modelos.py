@@ -0,0 +1,83 @@
+# ============================================================
+#   bench_modelos.py — Custo por envio das mensagens fixas
+#   Compara montar o embed + view do zero a cada envio (como era)
+#   com o modelos.py (embed serializado uma vez, cópia rasa com o
+#   timestamp, view única). Mede o tempo e o pico de memória
+#   alocada (tracemalloc) por envio até o payload (to_dict) pronto.
+#
+#   Uso:  python benchmarks/bench_modelos.py [--envios 10000]
+# ============================================================
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TOKEN", "benchmark")   # config.py exige o token
+
+import discord
+from modelos import modelos
+from cogs.regras import Regras
+from cogs.zoacao import Zoacao, ZoacaoView
+
+
+def _medir(nome: str, envios: int, enviar) -> dict:
+    enviar()   # aquece caches (o modelo é montado no primeiro envio)
+    gc.collect()
+    tracemalloc.start()
+    picos = 0
+    for _ in range(envios):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        enviar()
+        picos += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    gc.collect()
+    inicio = time.perf_counter()
+    for _ in range(envios):
+        enviar()
+    por_envio = (time.perf_counter() - inicio) / envios
+    print(f"{nome:<34} {por_envio * 1e6:>10.1f} µs {picos / envios:>12,.0f} B")
+    return {"tempo": por_envio, "bytes": picos / envios}
+
+
+async def _main(envios: int):
+    # Os construtores não usam o bot, então os cogs são criados sem __init__
+    regras = Regras.__new__(Regras)
+    zoacao = Zoacao.__new__(Zoacao)
+    modelos.registrar("regras", regras.build_embed)
+    modelos.registrar("zoacao", zoacao.build_embed)
+    view = modelos.registrar_view("zoacao", ZoacaoView())
+
+    def antigo():
+        for construir in (regras.build_embed, zoacao.build_embed):
+            embed = construir(None)
+            embed.timestamp = discord.utils.utcnow()
+            embed.to_dict()
+        ZoacaoView().to_components()
+
+    def atual():
+        for nome in ("regras", "zoacao"):
+            modelos.embed(nome).to_dict()
+        view.to_components()
+
+    print(f"Regras + zoação, {envios:,} envio(s) de cada jeito\n")
+    print(f"{'':<34} {'tempo/envio':>13} {'pico alocado/envio':>20}")
+    a = _medir("montando do zero", envios, antigo)
+    d = _medir("modelos.py (payload em cache)", envios, atual)
+    print(
+        f"\nmodelos.py: {a['tempo'] / d['tempo']:.1f}× mais rápido, "
+        f"{a['bytes'] / max(d['bytes'], 1):.1f}× menos memória alocada por envio."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark dos embeds/views fixos.")
+    parser.add_argument("--envios", type=int, default=10000, help="Envios simulados (padrão 10000)")
+    args = parser.parse_args()
+    # discord.ui.View precisa de um event loop rodando para ser criada
+    asyncio.run(_main(args.envios))
@@ -0,0 +1,84 @@
+# ============================================================
+#   bench_views.py — Registro dos botões persistentes no startup
+#   Compara o jeito antigo (uma View por linha do catálogo, cada
+#   uma com custom_id fixo, via add_view) com o atual (um único
+#   DynamicItem por template, via add_dynamic_items): tempo e
+#   memória (tracemalloc) para registrar N produtos.
+#
+#   Uso:  python benchmarks/bench_views.py [--n 10000]
+#   Não precisa de banco nem de token válido (a consulta ao catálogo
+#   que o jeito antigo fazia antes do add_view não entra na conta).
+# ============================================================
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TOKEN", "benchmark")   # config.py exige o token
+
+import discord
+from discord.ui.view import ViewStore
+from cogs.loja import CarrinhoButton
+from cogs.free import FreeButton
+
+
+class CarrinhoViewAntiga(discord.ui.View):
+    """Como era antes dos DynamicItems: uma View persistente por produto."""
+
+    def __init__(self, produto_id: str):
+        super().__init__(timeout=None)
+        self.carrinho_btn.custom_id = f"carrinho_btn_{produto_id}"
+
+    @discord.ui.button(label="🛒  Adicionar ao Carrinho", style=discord.ButtonStyle.primary,
+                       custom_id="carrinho_btn_placeholder")
+    async def carrinho_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+
+def _medir(nome: str, registrar) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    store = registrar()
+    duracao = time.perf_counter() - inicio
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<32} {duracao * 1000:>10.1f} ms {atual / 1024:>12,.0f} KiB {pico / 1024:>12,.0f} KiB")
+    del store
+    return {"duracao": duracao, "memoria": atual, "pico": pico}
+
+
+async def _main(n: int):
+    ids = [f"prod_{i:05d}" for i in range(1, n + 1)]
+
+    def antigo():
+        store = ViewStore(None)
+        for produto_id in ids:
+            store.add_view(CarrinhoViewAntiga(produto_id))
+        return store
+
+    def dinamico():
+        store = ViewStore(None)
+        store.add_dynamic_items(CarrinhoButton, FreeButton)
+        return store
+
+    print(f"Registrando botões persistentes para {n:,} produto(s)\n")
+    print(f"{'':<32} {'tempo':>13} {'memória retida':>16} {'pico':>16}")
+    a = _medir(f"{n:,} × add_view(CarrinhoView)", antigo)
+    d = _medir("1 × add_dynamic_items", dinamico)
+    print(
+        f"\nDynamicItem: {a['duracao'] / max(d['duracao'], 1e-9):,.0f}× mais rápido, "
+        f"{(a['memoria'] - d['memoria']) / 1024 / 1024:,.1f} MiB a menos retidos."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do registro de views persistentes.")
+    parser.add_argument("--n", type=int, default=10000, help="Linhas do catálogo (padrão 10000)")
+    args = parser.parse_args()
+    # discord.ui.View precisa de um event loop rodando para ser criada
+    asyncio.run(_main(args.n))
@@ -0,0 +1,179 @@
+# ============================================================
+#   catalogo.py — Cache em memória de produtos e free_itens
+#   Aquecido no startup e invalidado via LISTEN/NOTIFY do Postgres
+#   (triggers criados em database.SCHEMA).
+# ============================================================
+import asyncio
+import json
+import logging
+from database import get_conn, fetchone, fetchall
+
+logger = logging.getLogger(__name__)
+
+CANAL_NOTIFY = "catalogo_alterado"
+TABELAS = ("produtos", "free_itens")
+
+
+class Catalogo:
+    def __init__(self):
+        self._dados = {tabela: {} for tabela in TABELAS}
+        # Contadores de invalidação: uma leitura só entra no cache se nenhum NOTIFY
+        # da mesma chave (ou da tabela inteira) chegou enquanto a consulta rodava
+        self._geracao = {tabela: 0 for tabela in TABELAS}
+        self._versoes = {tabela: {} for tabela in TABELAS}
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self._listen_conn = None
+        self._reconectando = None
+        # Funções (tabela, id, op) chamadas a cada NOTIFY, depois da invalidação (ver vitrine.py)
+        self.ouvintes = []
+
+    # ── Leitura ──────────────────────────────────────────────────────
+
+    async def get(self, tabela: str, item_id: str):
+        """Lê do cache; em caso de miss busca no banco e guarda o resultado."""
+        cache = self._dados[tabela]
+        row = cache.get(item_id)
+        if row is not None:
+            self.hits += 1
+            return row
+        self.misses += 1
+        versao = self._versao(tabela, item_id)
+        row = await fetchone(f"SELECT * FROM {tabela} WHERE id = %s", (item_id,))
+        if row is not None and versao == self._versao(tabela, item_id):
+            cache[item_id] = dict(row)
+        return row
+
+    async def get_produto(self, produto_id: str):
+        return await self.get("produtos", produto_id)
+
+    async def get_free(self, item_id: str):
+        return await self.get("free_itens", item_id)
+
+    def ids(self, tabela: str) -> list:
+        return list(self._dados[tabela])
+
+    def _versao(self, tabela: str, item_id: str) -> tuple:
+        return self._geracao[tabela], self._versoes[tabela].get(item_id, 0)
+
+    def invalidar(self, tabela: str, item_id: str = None):
+        if tabela not in self._dados:
+            return
+        self.invalidacoes += 1
+        if item_id is None:
+            # A geração nova já invalida qualquer leitura em andamento
+            self._geracao[tabela] += 1
+            self._versoes[tabela].clear()
+            self._dados[tabela].clear()
+        else:
+            versoes = self._versoes[tabela]
+            versoes[item_id] = versoes.get(item_id, 0) + 1
+            self._dados[tabela].pop(item_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "invalidacoes": self.invalidacoes,
+            "produtos": len(self._dados["produtos"]),
+            "free_itens": len(self._dados["free_itens"]),
+            "escutando": self._listen_conn is not None,
+        }
+
+    # ── Ciclo de vida ────────────────────────────────────────────────
+
+    async def iniciar(self):
+        """Começa a escutar o NOTIFY e carrega todo o catálogo na memória."""
+        await self._escutar()
+        await self.aquecer()
+
+    async def aquecer(self):
+        for tabela in TABELAS:
+            geracao, versoes = self._geracao[tabela], dict(self._versoes[tabela])
+            rows = await fetchall(f"SELECT * FROM {tabela}")
+            if geracao != self._geracao[tabela]:
+                # Tabela inteira invalidada durante a carga: fica vazia e é lida sob demanda
+                logger.warning(f"⚠️ {tabela} invalidada durante o aquecimento; cache começa vazio.")
+                continue
+            # Linhas alteradas durante a carga ficam de fora (o próximo get lê do banco)
+            atual = self._versoes[tabela]
+            self._dados[tabela] = {
+                r["id"]: dict(r) for r in rows if atual.get(r["id"], 0) == versoes.get(r["id"], 0)
+            }
+        logger.info(
+            f"✅ Catálogo em cache: {len(self._dados['produtos'])} produto(s), "
+            f"{len(self._dados['free_itens'])} item(ns) free."
+        )
+
+    async def parar(self):
+        if self._reconectando:
+            self._reconectando.cancel()
+            self._reconectando = None
+        self._fechar_listener()
+
+    async def _escutar(self):
+        conn = await asyncio.to_thread(get_conn)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CANAL_NOTIFY}")
+        asyncio.get_running_loop().add_reader(conn.fileno(), self._on_notify)
+        self._listen_conn = conn
+        logger.info(f"👂 Catálogo escutando NOTIFY em '{CANAL_NOTIFY}'.")
+
+    def _fechar_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+        except Exception:
+            pass
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _on_notify(self):
+        conn = self._listen_conn
+        if conn is None:
+            return
+        try:
+            conn.poll()
+        except Exception as e:
+            logger.error(f"Conexão LISTEN do catálogo caiu: {e}")
+            self._fechar_listener()
+            # Sem notificações não dá para confiar no cache até reconectar
+            for tabela in TABELAS:
+                self.invalidar(tabela)
+            self._reconectando = asyncio.get_running_loop().create_task(self._reconectar())
+            return
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                payload = json.loads(notify.payload)
+                self.invalidar(payload["tabela"], payload["id"])
+            except Exception as e:
+                logger.warning(f"NOTIFY inválido do catálogo ({notify.payload!r}): {e}")
+                continue
+            for ouvinte in self.ouvintes:
+                try:
+                    ouvinte(payload["tabela"], payload["id"], payload.get("op"))
+                except Exception as e:
+                    logger.error(f"Erro num ouvinte do catálogo: {e}")
+
+    async def _reconectar(self):
+        espera = 1
+        while self._listen_conn is None:
+            await asyncio.sleep(espera)
+            try:
+                await self.iniciar()
+            except Exception as e:
+                logger.warning(f"Falha ao reconectar LISTEN do catálogo: {e}")
+                espera = min(espera * 2, 60)
+        self._reconectando = None
+
+
+catalogo = Catalogo()
@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from config import *
+from cogs.logs import Logs
+from envios import agendador, PRIORIDADE_NORMAL
 
 logger = logging.getLogger(__name__)
 
@@ -59,22 +61,14 @@ class Anuncios(commands.Cog):
             embed.set_image(url=imagem_url)
 
         conteudo = "@everyone" if mencionar_todos else ""
-        await canal.send(content=conteudo, embed=embed)
+        await agendador.enviar(canal.id, lambda: canal.send(content=conteudo, embed=embed), PRIORIDADE_NORMAL, "anúncio")
 
         # Log
-        await self._log(interaction.guild, interaction.user, titulo)
+        self._log(interaction.guild, interaction.user, titulo)
         await interaction.followup.send("✅ Anúncio enviado com sucesso!", ephemeral=True)
 
-    async def _log(self, guild, autor, titulo):
-        canal_log = guild.get_channel(CH_LOGS)
-        if canal_log:
-            embed = discord.Embed(
-                title="📋 Log — Anúncio enviado",
-                color=COR_INFO,
-                description=f"**Título:** {titulo}\n**Por:** {autor.mention}"
-            )
-            embed.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=embed)
+    def _log(self, guild, autor, titulo):
+        Logs.registrar(guild, "Log — Anúncio enviado", f"**Título:** {titulo}\n**Por:** {autor.mention}", COR_INFO)
 
     @anunciar.error
     async def anunciar_error(self, interaction: discord.Interaction, error):
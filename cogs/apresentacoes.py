@@ -1,15 +1,48 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import logging
+import logging, asyncio, time
+from collections import deque
 from config import *
+from cogs.logs import Logs
+from envios import agendador, PRIORIDADE_USUARIO
+from metricas import metricas
 
 logger = logging.getLogger(__name__)
 
+entrada_transicoes = metricas.contador(
+    "natan_entrada_massa_transicoes_total", "Trocas do modo de entrada em massa.", ("modo",)
+)
+entrada_modo_burst = metricas.gauge(
+    "natan_entrada_massa_ativo", "1 enquanto as boas-vindas estão sendo agrupadas (entrada em massa)."
+)
+entrada_modo_burst.set(0)
+entradas_agrupadas = metricas.contador(
+    "natan_entrada_massa_membros_total", "Membros recebidos numa mensagem agrupada."
+)
+lotes_enviados = metricas.contador(
+    "natan_entrada_massa_lotes_total", "Mensagens de boas-vindas agrupadas enviadas."
+)
+
 
 class Apresentacoes(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._entradas = deque()    # instantes (monotonic) das entradas recentes
+        self._pendentes = []        # membros aguardando a mensagem agrupada
+        self._agrupador = None
+        self.modo_burst = False
+
+    async def cog_unload(self):
+        if self._agrupador:
+            self._agrupador.cancel()
+
+    def _taxa_entradas(self) -> int:
+        """Quantas entradas caíram dentro da janela BURST_JANELA."""
+        limite = time.monotonic() - BURST_JANELA
+        while self._entradas and self._entradas[0] < limite:
+            self._entradas.popleft()
+        return len(self._entradas)
 
     def build_boas_vindas(self, member: discord.Member) -> discord.Embed:
         numero = member.guild.member_count
@@ -63,23 +96,77 @@ class Apresentacoes(commands.Cog):
             logger.warning("⚠️ Canal de apresentações não encontrado.")
             return
 
+        self._entradas.append(time.monotonic())
+        if not self.modo_burst and self._taxa_entradas() >= BURST_LIMIAR:
+            self.modo_burst = True
+            entrada_transicoes.inc("burst")
+            entrada_modo_burst.set(1)
+            logger.warning(f"🚨 Entrada em massa detectada ({len(self._entradas)} em {BURST_JANELA:.0f}s): boas-vindas agrupadas.")
+            Logs.registrar(member.guild, "Log — Modo entrada em massa ATIVADO",
+                           f"**{len(self._entradas)}** entradas em {BURST_JANELA:.0f}s.", COR_AVISO)
+            self._agrupador = self.bot.loop.create_task(self._agrupar(member.guild))
+
+        if self.modo_burst:
+            self._pendentes.append(member)
+            entradas_agrupadas.inc()
+            return
+
         embed = self.build_boas_vindas(member)
         try:
-            await canal.send(embed=embed)
+            await agendador.enviar(canal.id, lambda: canal.send(embed=embed), PRIORIDADE_USUARIO, "boas-vindas")
             logger.info(f"✅ Boas-vindas enviado para {member.display_name}")
         except Exception as e:
             logger.error(f"Erro ao enviar boas-vindas: {e}")
 
         # Log
-        canal_log = member.guild.get_channel(CH_LOGS)
-        if canal_log:
-            log_embed = discord.Embed(
-                title="📋 Log — Novo membro",
-                color=COR_SUCESSO,
-                description=f"**{member.mention}** entrou no servidor."
-            )
-            log_embed.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=log_embed)
+        Logs.registrar(member.guild, "Log — Novo membro", f"**{member.mention}** entrou no servidor.", COR_SUCESSO)
+
+    async def _agrupar(self, guild: discord.Guild):
+        """Enquanto durar a entrada em massa, envia uma mensagem por intervalo com todos os novos membros."""
+        try:
+            while True:
+                await asyncio.sleep(BURST_INTERVALO)
+                if self._pendentes:
+                    lote, self._pendentes = self._pendentes, []
+                    await self._enviar_lote(guild, lote)
+                # Histerese: só volta ao normal quando a taxa cai para metade do limiar
+                if self._taxa_entradas() < max(1, BURST_LIMIAR // 2) and not self._pendentes:
+                    break
+        finally:
+            self.modo_burst = False
+            self._agrupador = None
+            entrada_transicoes.inc("normal")
+            entrada_modo_burst.set(0)
+            logger.info("✅ Entradas normalizadas: boas-vindas individuais reativadas.")
+            Logs.registrar(guild, "Log — Modo entrada em massa desativado",
+                           "Boas-vindas individuais reativadas.", COR_SUCESSO)
+
+    async def _enviar_lote(self, guild: discord.Guild, lote: list):
+        canal = guild.get_channel(CH_APRESENTACOES)
+        mencoes = " ".join(m.mention for m in lote)
+        if len(mencoes) > 3800:
+            mencoes = mencoes[:3800].rsplit(" ", 1)[0] + " …"
+        embed = discord.Embed(
+            title=f"✨  {len(lote)} novos membros chegaram ao NatanSites!",
+            description=(
+                f"Sejam todos bem-vindos! 🎉\n\n{mencoes}\n\n"
+                f"📜 Leiam as regras em <#{CH_REGRAS}> e se apresentem aqui no canal!"
+            ),
+            color=COR_BOAS_VINDAS
+        )
+        embed.set_footer(text=f"NatanSites • Serviço de Sites | Membros: {guild.member_count}")
+        embed.timestamp = discord.utils.utcnow()
+        if canal:
+            try:
+                await agendador.enviar(canal.id, lambda: canal.send(embed=embed), PRIORIDADE_USUARIO, "boas-vindas em lote")
+                lotes_enviados.inc()
+            except Exception as e:
+                logger.error(f"Erro ao enviar boas-vindas em lote: {e}")
+
+        resumo = ", ".join(str(m.id) for m in lote)
+        if len(resumo) > 3500:
+            resumo = resumo[:3500].rsplit(",", 1)[0] + ", …"
+        Logs.registrar(guild, f"Log — {len(lote)} novos membros (entrada em massa)", f"**IDs:** {resumo}", COR_AVISO)
 
     async def auto_setup(self, guild: discord.Guild):
         # Apresentações não tem mensagem fixa, só evento — nada a fazer aqui
@@ -1,13 +1,247 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
+import csv
+import datetime
+import io
+import json
 import logging
+import re
 from config import *
-from database import get_conn
+from cogs.logs import Logs
+from envios import agendador, PRIORIDADE_NORMAL
+from database import fetchall, run, ACUMULAR_VENDAS
+from dinheiro import ler_valor, formatar_valor
 
 logger = logging.getLogger(__name__)
 
 
+HISTORICO_POR_PAGINA    = 10
+RELATORIO_DIAS          = 30   # período padrão do /relatorio-vendas
+RELATORIO_LINHAS        = 15   # produtos/dias listados no relatório
+
+LOTE_MAX                = 500  # compras por arquivo no /registrar-compras-lote
+LOTE_ARQUIVO_MAX        = 1024 * 1024
+EMBEDS_POR_MENSAGEM     = 10   # limites do Discord por mensagem
+CARACTERES_POR_MENSAGEM = 6000
+
+# Numera, insere e soma em vendas_diarias num único comando (uma ida ao banco):
+# o contador avança de uma vez pelo tamanho do lote e cada compra recebe
+# base + sua posição na lista (NTS-0001, NTS-0002, ...).
+REGISTRAR_COMPRAS_SQL = """
+WITH contador AS (
+    UPDATE compras_contador SET valor = valor + %s WHERE id = 1 RETURNING valor - %s AS base
+), entrada AS (
+    SELECT * FROM unnest(%s::bigint[], %s::text[], %s::bigint[], %s::text[])
+        WITH ORDINALITY AS e(usuario_id, produto, valor_centavos, observacao, pos)
+), novos AS (
+    INSERT INTO compras (id, usuario_id, produto, valor_centavos, observacao)
+    SELECT 'NTS-' || lpad((c.base + e.pos)::text, GREATEST(4, length((c.base + e.pos)::text)), '0'),
+           e.usuario_id, e.produto, e.valor_centavos, e.observacao
+    FROM entrada e CROSS JOIN contador c
+    RETURNING id, usuario_id, produto, valor_centavos, observacao, criado_em
+)""" + ACUMULAR_VENDAS + """
+SELECT * FROM novos
+"""
+
+
+async def registrar_compras(compras: list) -> list:
+    """Registra uma ou várias compras (usuario_id, produto, valor_centavos, observacao) numa transação.
+
+    Retorna as linhas inseridas na mesma ordem da entrada.
+    """
+    def _registrar_compras(cur):
+        colunas = list(zip(*compras))
+        cur.execute(REGISTRAR_COMPRAS_SQL, (len(compras), len(compras), *map(list, colunas)))
+        return cur.fetchall()
+
+    rows = await run(_registrar_compras)
+    return sorted(rows, key=lambda r: int(r["id"].split("-")[1]))
+
+
+def _campo(registro: dict, *nomes):
+    for nome in nomes:
+        valor = registro.get(nome)
+        if valor not in (None, ""):
+            return valor
+    return None
+
+
+def ler_lote(nome_arquivo: str, dados: bytes):
+    """Lê o anexo do /registrar-compras-lote (CSV com cabeçalho ou JSON).
+
+    Colunas: usuario_id (ou usuario / menção), produto, valor, observacao.
+    Retorna (compras, erros); com qualquer erro o lote inteiro é recusado.
+    """
+    texto = dados.decode("utf-8-sig")
+    if nome_arquivo.lower().endswith(".json"):
+        conteudo = json.loads(texto)
+        registros = conteudo.get("compras", []) if isinstance(conteudo, dict) else conteudo
+    else:
+        dialeto = csv.Sniffer().sniff(texto.split("\n", 1)[0], delimiters=",;\t")
+        registros = list(csv.DictReader(io.StringIO(texto), dialect=dialeto))
+    if not isinstance(registros, list):
+        return [], ['JSON inválido: use uma lista de compras ou {"compras": [...]}']
+
+    compras, erros = [], []
+    for linha, registro in enumerate(registros, start=1):
+        if not isinstance(registro, dict):
+            erros.append(f"Linha {linha}: formato inválido")
+            continue
+        registro = {str(k).strip().lower(): (v.strip() if isinstance(v, str) else v) for k, v in registro.items() if k}
+        usuario = re.sub(r"[<@!>]", "", str(_campo(registro, "usuario_id", "usuario") or ""))
+        produto = _campo(registro, "produto")
+        if not usuario.isdigit():
+            erros.append(f"Linha {linha}: usuário inválido")
+            continue
+        if not produto:
+            erros.append(f"Linha {linha}: produto vazio")
+            continue
+        try:
+            valor_centavos = ler_valor(str(_campo(registro, "valor") or ""))
+        except ValueError:
+            erros.append(f"Linha {linha}: valor inválido")
+            continue
+        observacao = _campo(registro, "observacao")
+        compras.append((int(usuario), str(produto), valor_centavos, str(observacao) if observacao is not None else None))
+    return compras, erros
+
+
+def agrupar_embeds(embeds: list) -> list:
+    """Divide os embeds em mensagens de até 10 embeds e 6000 caracteres."""
+    mensagens, atual, total = [], [], 0
+    for embed in embeds:
+        if atual and (len(atual) == EMBEDS_POR_MENSAGEM or total + len(embed) > CARACTERES_POR_MENSAGEM):
+            mensagens.append(atual)
+            atual, total = [], 0
+        atual.append(embed)
+        total += len(embed)
+    if atual:
+        mensagens.append(atual)
+    return mensagens
+
+
+def embed_compra(compra: dict, autor: discord.Member, usuario: discord.abc.User = None) -> discord.Embed:
+    """Embed de confirmação postado no canal Compras (avatar só quando o membro é conhecido)."""
+    embed = discord.Embed(
+        title="✅  Compra Confirmada!",
+        description="Uma nova compra foi registrada com sucesso no **NatanSites**.",
+        color=COR_SUCESSO
+    )
+    if usuario:
+        embed.set_thumbnail(url=usuario.display_avatar.url)
+    embed.add_field(name="👤  Comprador", value=f"<@{compra['usuario_id']}>", inline=True)
+    embed.add_field(name="🆔  Pedido Nº", value=f"`{compra['id']}`", inline=True)
+    embed.add_field(name="🛍️  Produto/Serviço", value=compra["produto"][:1024], inline=False)
+    embed.add_field(name="💰  Valor Pago", value=formatar_valor(compra["valor_centavos"]), inline=True)
+    if compra.get("observacao"):
+        embed.add_field(name="📝  Observação", value=str(compra["observacao"])[:1024], inline=False)
+    embed.set_footer(
+        text=f"Registrado por {autor.display_name} | NatanSites",
+        icon_url=autor.display_avatar.url
+    )
+    embed.timestamp = discord.utils.utcnow()
+    return embed
+
+
+async def buscar_pagina_historico(filtros: dict, antes: tuple = None, limite: int = HISTORICO_POR_PAGINA) -> list:
+    """Uma página do histórico, da mais recente para a mais antiga.
+
+    Paginada por keyset em (criado_em, id): cada página começa logo depois
+    da última linha da anterior, sem OFFSET, usando os índices de compras.
+    """
+    condicoes, params = [], []
+    if filtros.get("usuario_id"):
+        condicoes.append("usuario_id = %s")
+        params.append(filtros["usuario_id"])
+    if filtros.get("produto"):
+        condicoes.append("produto ILIKE %s")
+        params.append(f"%{filtros['produto']}%")
+    if filtros.get("de"):
+        condicoes.append("criado_em >= %s")
+        params.append(filtros["de"])
+    if filtros.get("ate"):
+        condicoes.append("criado_em < %s")
+        params.append(filtros["ate"] + datetime.timedelta(days=1))   # dia final inteiro
+    if antes is not None:
+        condicoes.append("(criado_em, id) < (%s, %s)")
+        params.extend(antes)
+    where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    return await fetchall(
+        f"""
+        SELECT id, usuario_id, produto, valor_centavos, observacao, criado_em
+        FROM compras
+        {where}
+        ORDER BY criado_em DESC, id DESC
+        LIMIT %s
+        """,
+        (*params, limite),
+        nome="select:compras_historico"
+    )
+
+
+def _ler_data(texto: str):
+    """Data no formato AAAA-MM-DD ou DD/MM/AAAA; None se vazio, ValueError se inválida."""
+    if not texto:
+        return None
+    texto = texto.strip()
+    if "/" in texto:
+        return datetime.datetime.strptime(texto, "%d/%m/%Y").date()
+    return datetime.date.fromisoformat(texto)
+
+
+class HistoricoPager(discord.ui.View):
+    """Paginação do /historico-compras: busca uma página por vez no banco."""
+
+    def __init__(self, autor_id: int, filtros: dict, descricao_filtros: str):
+        super().__init__(timeout=300)
+        self.autor_id = autor_id
+        self.filtros = filtros
+        self.descricao_filtros = descricao_filtros
+        self.cursores = []      # início (antes) de cada página já vista
+        self.fim = False
+        self.ultimo = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.autor_id
+
+    async def carregar_pagina(self, antes: tuple):
+        rows = await buscar_pagina_historico(self.filtros, antes, HISTORICO_POR_PAGINA + 1)
+        self.fim = len(rows) <= HISTORICO_POR_PAGINA
+        rows = rows[:HISTORICO_POR_PAGINA]
+        self.cursores.append(antes)
+        self.ultimo = (rows[-1]["criado_em"], rows[-1]["id"]) if rows else antes
+
+        embed = discord.Embed(title="🧾  Histórico de Compras", description=self.descricao_filtros,
+                              color=COR_SUCESSO)
+        for r in rows:
+            data = r["criado_em"].strftime("%d/%m/%Y %H:%M") if r["criado_em"] else "—"
+            valor = f"👤 <@{r['usuario_id']}> · 🛍️ {r['produto']} · 💰 {formatar_valor(r['valor_centavos'])}"
+            if r["observacao"]:
+                valor += f"\n📝 {r['observacao'][:200]}"
+            embed.add_field(name=f"`{r['id']}` · {data}", value=valor, inline=False)
+        if not rows:
+            embed.add_field(name="Nada encontrado", value="Nenhuma compra com esses filtros.", inline=False)
+        embed.set_footer(text=f"Página {len(self.cursores)}")
+        embed.timestamp = discord.utils.utcnow()
+        self.anterior.disabled = len(self.cursores) <= 1
+        self.proxima.disabled = self.fim
+        return embed, len(rows)
+
+    @discord.ui.button(label="◀  Anterior", style=discord.ButtonStyle.secondary)
+    async def anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursores.pop()                 # página atual
+        antes = self.cursores.pop()         # início da anterior (recarregado abaixo)
+        embed, _ = await self.carregar_pagina(antes)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Próxima  ▶", style=discord.ButtonStyle.secondary)
+    async def proxima(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed, _ = await self.carregar_pagina(self.ultimo)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+
 class Compras(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -16,7 +250,7 @@ class Compras(commands.Cog):
     @app_commands.describe(
         usuario="Usuário que realizou a compra",
         produto="Nome do produto/serviço",
-        valor="Valor pago (ex: 49.90)",
+        valor="Valor pago (ex: 49,90)",
         observacao="Observação adicional (opcional)"
     )
     @app_commands.checks.has_permissions(administrator=True)
@@ -26,56 +260,31 @@ class Compras(commands.Cog):
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
 
+        try:
+            valor_centavos = ler_valor(valor)
+        except ValueError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("UPDATE compras_contador SET valor = valor + 1 WHERE id = 1")
-                    cur.execute("SELECT valor FROM compras_contador WHERE id = 1")
-                    contador = cur.fetchone()["valor"]
-                    compra_id = f"NTS-{contador:04d}"
-                    cur.execute(
-                        "INSERT INTO compras (id, usuario_id, produto, valor, observacao) VALUES (%s, %s, %s, %s, %s)",
-                        (compra_id, usuario.id, produto, valor, observacao)
-                    )
-        finally:
-            conn.close()
+        compra_id = (await registrar_compras([(usuario.id, produto, valor_centavos, observacao)]))[0]["id"]
 
         canal = interaction.guild.get_channel(CH_COMPRAS)
         if not canal:
             await interaction.followup.send("❌ Canal de compras não encontrado.", ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title="✅  Compra Confirmada!",
-            description="Uma nova compra foi registrada com sucesso no **NatanSites**.",
-            color=COR_SUCESSO
-        )
-        embed.set_thumbnail(url=usuario.display_avatar.url)
-        embed.add_field(name="👤  Comprador", value=usuario.mention, inline=True)
-        embed.add_field(name="🆔  Pedido Nº", value=f"`{compra_id}`", inline=True)
-        embed.add_field(name="🛍️  Produto/Serviço", value=produto, inline=False)
-        embed.add_field(name="💰  Valor Pago", value=f"R$ {valor}", inline=True)
-        if observacao:
-            embed.add_field(name="📝  Observação", value=observacao, inline=False)
-        embed.set_footer(
-            text=f"Registrado por {interaction.user.display_name} | NatanSites",
-            icon_url=interaction.user.display_avatar.url
+        compra = {"id": compra_id, "usuario_id": usuario.id, "produto": produto,
+                  "valor_centavos": valor_centavos, "observacao": observacao}
+        embed = embed_compra(compra, interaction.user, usuario)
+        await agendador.enviar(canal.id, lambda: canal.send(embed=embed), PRIORIDADE_NORMAL, "compra")
+
+        Logs.registrar(
+            interaction.guild, "Log — Compra registrada",
+            f"**Pedido:** {compra_id}\n**Comprador:** {usuario.mention}\n**Produto:** {produto}\n**Valor:** {formatar_valor(valor_centavos)}",
+            COR_SUCESSO
         )
-        embed.timestamp = discord.utils.utcnow()
-        await canal.send(embed=embed)
-
-        canal_log = interaction.guild.get_channel(CH_LOGS)
-        if canal_log:
-            log = discord.Embed(
-                title="📋 Log — Compra registrada",
-                description=f"**Pedido:** {compra_id}\n**Comprador:** {usuario.mention}\n**Produto:** {produto}\n**Valor:** R$ {valor}",
-                color=COR_SUCESSO
-            )
-            log.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=log)
 
         await interaction.followup.send(f"✅ Compra `{compra_id}` registrada!", ephemeral=True)
 
@@ -83,6 +292,214 @@ class Compras(commands.Cog):
     async def error(self, interaction, error):
         await interaction.response.send_message("❌ Sem permissão.", ephemeral=True)
 
+    @app_commands.command(name="registrar-compras-lote",
+                          description="[ADM] Registra várias compras de um arquivo CSV ou JSON.")
+    @app_commands.describe(
+        arquivo="CSV (cabeçalho usuario_id,produto,valor,observacao) ou JSON com a lista de compras"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def registrar_compras_lote(self, interaction: discord.Interaction, arquivo: discord.Attachment):
+        if interaction.channel_id != CH_CONTROLE:
+            await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
+            return
+        if arquivo.size > LOTE_ARQUIVO_MAX:
+            await interaction.response.send_message("❌ Arquivo muito grande (máximo 1 MB).", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        try:
+            compras, erros = ler_lote(arquivo.filename, await arquivo.read())
+        except (ValueError, csv.Error) as e:   # JSON inválido, encoding, CSV ilegível
+            await interaction.followup.send(f"❌ Não consegui ler o arquivo: {e}", ephemeral=True)
+            return
+        if erros:
+            lista = "\n".join(erros[:15]) + (f"\n… e mais {len(erros) - 15}" if len(erros) > 15 else "")
+            await interaction.followup.send(f"❌ Nada foi registrado. Corrija o arquivo:\n{lista}", ephemeral=True)
+            return
+        if not compras:
+            await interaction.followup.send("❌ O arquivo não tem nenhuma compra.", ephemeral=True)
+            return
+        if len(compras) > LOTE_MAX:
+            await interaction.followup.send(f"❌ Máximo de {LOTE_MAX} compras por arquivo.", ephemeral=True)
+            return
+
+        registradas = await registrar_compras(compras)
+        primeiro, ultimo = registradas[0]["id"], registradas[-1]["id"]
+        total = sum(c["valor_centavos"] for c in registradas)
+
+        canal = interaction.guild.get_channel(CH_COMPRAS)
+        if canal:
+            # Várias confirmações por mensagem; o agendador espaça as mensagens dentro do limite do canal
+            embeds = [embed_compra(c, interaction.user, interaction.guild.get_member(c["usuario_id"]))
+                      for c in registradas]
+            envios = [
+                agendador.agendar(canal.id, lambda lote=lote: canal.send(embeds=lote),
+                                  PRIORIDADE_NORMAL, "compras em lote")
+                for lote in agrupar_embeds(embeds)
+            ]
+            falhas = [r for r in await asyncio.gather(*envios, return_exceptions=True) if isinstance(r, Exception)]
+            if falhas:
+                logger.error(f"Erro ao postar {len(falhas)} mensagem(ns) do lote {primeiro}…{ultimo}: {falhas[0]}")
+
+        Logs.registrar(
+            interaction.guild, "Log — Compras registradas em lote",
+            f"**Pedidos:** {primeiro} → {ultimo} ({len(registradas)})\n**Total:** {formatar_valor(total)}\n"
+            f"**Arquivo:** {arquivo.filename}\n**Por:** {interaction.user.mention}",
+            COR_SUCESSO
+        )
+
+        aviso = "" if canal else "\n⚠️ Canal de compras não encontrado: nenhuma confirmação foi postada."
+        await interaction.followup.send(
+            f"✅ {len(registradas)} compra(s) registrada(s): `{primeiro}` → `{ultimo}` · "
+            f"{formatar_valor(total)}{aviso}", ephemeral=True
+        )
+
+    @registrar_compras_lote.error
+    async def lote_error(self, interaction, error):
+        if interaction.response.is_done():
+            # Erro depois do defer (não é de permissão): responde pelo followup
+            logger.error(f"Erro no /registrar-compras-lote: {error}")
+            await interaction.followup.send("❌ Erro ao processar o lote. Veja o log do bot.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Sem permissão.", ephemeral=True)
+
+    @app_commands.command(name="historico-compras", description="[ADM] Consulta o histórico de compras.")
+    @app_commands.describe(
+        usuario="Filtrar por comprador (opcional)",
+        produto="Filtrar por parte do nome do produto (opcional)",
+        de="Data inicial, AAAA-MM-DD ou DD/MM/AAAA (opcional)",
+        ate="Data final, inclusive (opcional)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def historico_compras(self, interaction: discord.Interaction, usuario: discord.User = None,
+                                produto: str = None, de: str = None, ate: str = None):
+        if interaction.channel_id != CH_CONTROLE:
+            await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
+            return
+
+        try:
+            data_de, data_ate = _ler_data(de), _ler_data(ate)
+        except ValueError:
+            await interaction.response.send_message(
+                "❌ Data inválida. Use AAAA-MM-DD ou DD/MM/AAAA.", ephemeral=True
+            )
+            return
+        if data_de and data_ate and data_de > data_ate:
+            await interaction.response.send_message("❌ A data inicial é depois da final.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        filtros = {"usuario_id": usuario.id if usuario else None, "produto": produto,
+                   "de": data_de, "ate": data_ate}
+        partes = []
+        if usuario:
+            partes.append(f"👤 {usuario.mention}")
+        if produto:
+            partes.append(f"🛍️ contém **{produto}**")
+        if data_de or data_ate:
+            partes.append(f"📅 {data_de.strftime('%d/%m/%Y') if data_de else '…'} → "
+                          f"{data_ate.strftime('%d/%m/%Y') if data_ate else 'hoje'}")
+        pager = HistoricoPager(interaction.user.id, filtros, " · ".join(partes) or "Todas as compras")
+        embed, qtd = await pager.carregar_pagina(None)
+        await interaction.followup.send(embed=embed, view=pager if qtd else discord.utils.MISSING,
+                                        ephemeral=True)
+
+    @historico_compras.error
+    async def historico_error(self, interaction, error):
+        if interaction.response.is_done():
+            # Erro depois do defer (não é de permissão): responde pelo followup
+            logger.error(f"Erro no /historico-compras: {error}")
+            await interaction.followup.send("❌ Erro ao consultar o histórico. Veja o log do bot.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Sem permissão.", ephemeral=True)
+
+    @app_commands.command(name="relatorio-vendas", description="[ADM] Faturamento por produto e por dia.")
+    @app_commands.describe(
+        de=f"Data inicial, AAAA-MM-DD ou DD/MM/AAAA (padrão: últimos {RELATORIO_DIAS} dias)",
+        ate="Data final, inclusive (padrão: hoje)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def relatorio_vendas(self, interaction: discord.Interaction, de: str = None, ate: str = None):
+        if interaction.channel_id != CH_CONTROLE:
+            await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
+            return
+
+        try:
+            data_ate = _ler_data(ate) or datetime.date.today()
+            data_de = _ler_data(de) or data_ate - datetime.timedelta(days=RELATORIO_DIAS - 1)
+        except ValueError:
+            await interaction.response.send_message(
+                "❌ Data inválida. Use AAAA-MM-DD ou DD/MM/AAAA.", ephemeral=True
+            )
+            return
+        if data_de > data_ate:
+            await interaction.response.send_message("❌ A data inicial é depois da final.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        # Só lê vendas_diarias (uma linha por dia e produto), nunca a tabela compras
+        def _relatorio(cur):
+            periodo = (data_de, data_ate)
+            cur.execute(
+                "SELECT COALESCE(SUM(quantidade), 0) AS qtd, COALESCE(SUM(total_centavos), 0) AS total, "
+                "COUNT(DISTINCT dia) AS dias FROM vendas_diarias WHERE dia BETWEEN %s AND %s",
+                periodo
+            )
+            resumo = cur.fetchone()
+            cur.execute(
+                "SELECT produto, SUM(quantidade) AS qtd, SUM(total_centavos) AS total FROM vendas_diarias "
+                "WHERE dia BETWEEN %s AND %s GROUP BY produto ORDER BY total DESC, produto LIMIT %s",
+                (*periodo, RELATORIO_LINHAS)
+            )
+            produtos = cur.fetchall()
+            cur.execute(
+                "SELECT dia, SUM(quantidade) AS qtd, SUM(total_centavos) AS total FROM vendas_diarias "
+                "WHERE dia BETWEEN %s AND %s GROUP BY dia ORDER BY dia DESC LIMIT %s",
+                (*periodo, RELATORIO_LINHAS)
+            )
+            return resumo, produtos, cur.fetchall()
+
+        resumo, produtos, dias = await run(_relatorio)
+
+        embed = discord.Embed(
+            title="📊  Relatório de Vendas",
+            description=f"📅 {data_de.strftime('%d/%m/%Y')} → {data_ate.strftime('%d/%m/%Y')}",
+            color=COR_SUCESSO
+        )
+        embed.add_field(name="💰  Faturamento", value=formatar_valor(resumo["total"]), inline=True)
+        embed.add_field(name="🧾  Vendas", value=str(resumo["qtd"]), inline=True)
+        media = resumo["total"] // resumo["qtd"] if resumo["qtd"] else 0
+        embed.add_field(name="🎯  Ticket médio", value=formatar_valor(media), inline=True)
+        if produtos:
+            embed.add_field(
+                name="🛍️  Por produto",
+                value="\n".join(f"• **{p['produto'][:60]}** — {p['qtd']}x · {formatar_valor(p['total'])}"
+                                for p in produtos)[:1024],
+                inline=False
+            )
+        if dias:
+            embed.add_field(
+                name="📆  Por dia",
+                value="\n".join(f"• {d['dia'].strftime('%d/%m')} — {d['qtd']}x · {formatar_valor(d['total'])}"
+                                for d in dias)[:1024],
+                inline=False
+            )
+        embed.set_footer(text="Valores agregados em vendas_diarias a cada compra registrada")
+        embed.timestamp = discord.utils.utcnow()
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    @relatorio_vendas.error
+    async def relatorio_error(self, interaction, error):
+        if interaction.response.is_done():
+            # Erro depois do defer (não é de permissão): responde pelo followup
+            logger.error(f"Erro no /relatorio-vendas: {error}")
+            await interaction.followup.send("❌ Erro ao gerar o relatório. Veja o log do bot.", ephemeral=True)
+            return
+        await interaction.response.send_message("❌ Sem permissão.", ephemeral=True)
+
 
 async def setup(bot):
     await bot.add_cog(Compras(bot))
@@ -3,32 +3,35 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from config import *
-from database import get_conn
+from envios import agendador, PRIORIDADE_NORMAL
+from catalogo import catalogo
+from database import fetchone, fetchall, execute
+from vitrine import vitrine
+from downloads import downloads, url_download, EVENTO_CLIQUE, EVENTO_DOWNLOAD, DOWNLOADS_INTERVALO
 
 logger = logging.getLogger(__name__)
 
 
-class FreeView(discord.ui.View):
-    def __init__(self, item_id: str):
-        super().__init__(timeout=None)
+class FreeButton(discord.ui.DynamicItem[discord.ui.Button], template=r"free_btn_(?P<item_id>.+)"):
+    """Botão persistente de todos os itens free: casa qualquer custom_id free_btn_<id>."""
+
+    def __init__(self, item_id: str, esgotado: bool = False):
+        super().__init__(discord.ui.Button(
+            label="❌  Esgotado" if esgotado else "⬇️  Adquirir Gratuitamente",
+            style=discord.ButtonStyle.secondary if esgotado else discord.ButtonStyle.success,
+            custom_id=f"free_btn_{item_id}",
+            disabled=esgotado
+        ))
         self.item_id = item_id
-        self.adquirir_btn.custom_id = f"free_btn_{item_id}"
 
-    @discord.ui.button(
-        label="⬇️  Adquirir Gratuitamente",
-        style=discord.ButtonStyle.success,
-        custom_id="free_btn_placeholder"
-    )
-    async def adquirir_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        item_id = interaction.data["custom_id"].replace("free_btn_", "")
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["item_id"])
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM free_itens WHERE id = %s", (item_id,))
-                item = cur.fetchone()
-        finally:
-            conn.close()
+    async def callback(self, interaction: discord.Interaction):
+        item_id = self.item_id
+
+        item = await catalogo.get_free(item_id)
 
         if not item:
             await interaction.response.send_message("❌ Item não encontrado.", ephemeral=True)
@@ -38,54 +41,41 @@ class FreeView(discord.ui.View):
             await interaction.response.send_message("❌ Item esgotado no momento.", ephemeral=True)
             return
 
+        # Com URL_PUBLICA, o link passa pelo /d/<item>/<token>, que registra o download
+        # (e dá baixa no estoque) só quando o membro realmente abre o link
+        link = url_download(item_id, interaction.user.id) if URL_PUBLICA else item["link"]
         embed = discord.Embed(
             title=f"⬇️  Download: {item['nome']}",
-            description=f"{item['descricao']}\n\n**Clique no link abaixo para baixar:**\n🔗 [Acessar Download]({item['link']})",
+            description=f"{item['descricao']}\n\n**Clique no link abaixo para baixar:**\n🔗 [Acessar Download]({link})",
             color=COR_FREE
         )
         embed.set_footer(text="NatanSites | Downloads Gratuitos")
         embed.timestamp = discord.utils.utcnow()
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-        if item["estoque"] is not None:
-            conn = get_conn()
-            try:
-                with conn:
-                    with conn.cursor() as cur:
-                        cur.execute("UPDATE free_itens SET estoque = estoque - 1 WHERE id = %s", (item_id,))
-            finally:
-                conn.close()
-
-        canal_log = interaction.guild.get_channel(CH_LOGS)
-        if canal_log:
-            log = discord.Embed(
-                title="📋 Log — Download Free",
-                description=f"**{interaction.user.mention}** baixou **{item['nome']}**.",
-                color=COR_FREE
-            )
-            log.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=log)
+        # Sem banco nem log por clique: vai para o buffer, gravado em lote
+        downloads.registrar(item_id, interaction.user.id, EVENTO_CLIQUE)
+        if not URL_PUBLICA:
+            downloads.registrar(item_id, interaction.user.id, EVENTO_DOWNLOAD)
+
+
+class FreeView(discord.ui.View):
+    def __init__(self, item_id: str, esgotado: bool = False):
+        super().__init__(timeout=None)
+        self.item_id = item_id
+        self.add_item(FreeButton(item_id, esgotado))
 
 
 class Free(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self._register_views()
+        # Um único registro atende os botões de todos os itens, sem query no startup
+        bot.add_dynamic_items(FreeButton)
+        vitrine.registrar(bot, "free_itens", CH_FREE, self._mensagem_item)
 
-    def _register_views(self):
-        try:
-            conn = get_conn()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT id FROM free_itens")
-                    itens = cur.fetchall()
-            finally:
-                conn.close()
-            for item in itens:
-                self.bot.add_view(FreeView(item["id"]))
-            logger.info(f"✅ Free: {len(itens)} view(s) registrada(s).")
-        except Exception as e:
-            logger.error(f"Erro ao registrar views free: {e}")
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(FreeButton)
+        vitrine.remover("free_itens")
 
     @app_commands.command(name="free-add", description="[ADM] Adiciona um item gratuito ao canal Free.")
     @app_commands.describe(
@@ -103,35 +93,20 @@ class Free(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT COUNT(*) FROM free_itens")
-                    count = cur.fetchone()["count"]
-                    item_id = f"free_{count + 1:04d}"
-                    cur.execute(
-                        "INSERT INTO free_itens (id, nome, descricao, link, estoque, imagem) VALUES (%s, %s, %s, %s, %s, %s)",
-                        (item_id, nome, descricao, link_download, estoque, imagem_url)
-                    )
-        finally:
-            conn.close()
+        # O ID (free_0001, ...) vem do DEFAULT da coluna, gerado por sequence
+        item_id = (await fetchone(
+            "INSERT INTO free_itens (nome, descricao, link, estoque, imagem) VALUES (%s, %s, %s, %s, %s) RETURNING id",
+            (nome, descricao, link_download, estoque, imagem_url)
+        ))["id"]
 
         canal = interaction.guild.get_channel(CH_FREE)
         item = {"nome": nome, "descricao": descricao, "link": link_download,
                 "estoque": estoque, "imagem": imagem_url}
-        embed = self._build_embed(item_id, item)
-        view = FreeView(item_id)
-        self.bot.add_view(view)
-        msg = await canal.send(embed=embed, view=view)
-
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("UPDATE free_itens SET msg_id = %s WHERE id = %s", (msg.id, item_id))
-        finally:
-            conn.close()
+        embed, view = self._mensagem_item(item_id, item)
+        msg = await agendador.enviar(canal.id, lambda: canal.send(embed=embed, view=view), PRIORIDADE_NORMAL, "item free")
+        vitrine.exibido("free_itens", item_id, estoque)
+
+        await execute("UPDATE free_itens SET msg_id = %s WHERE id = %s", (msg.id, item_id))
 
         await interaction.followup.send(f"✅ Item **{nome}** adicionado! (ID: `{item_id}`)", ephemeral=True)
 
@@ -145,13 +120,7 @@ class Free(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM free_itens WHERE id = %s", (item_id,))
-                item = cur.fetchone()
-        finally:
-            conn.close()
+        item = await fetchone("SELECT * FROM free_itens WHERE id = %s", (item_id,))
 
         if not item:
             await interaction.followup.send("❌ Item não encontrado.", ephemeral=True)
@@ -160,21 +129,66 @@ class Free(commands.Cog):
         canal = interaction.guild.get_channel(CH_FREE)
         if item["msg_id"] and canal:
             try:
-                msg = await canal.fetch_message(item["msg_id"])
-                await msg.delete()
+                msg = canal.get_partial_message(item["msg_id"])
+                await agendador.enviar(canal.id, msg.delete, PRIORIDADE_NORMAL, "remover item")
             except Exception:
                 pass
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("DELETE FROM free_itens WHERE id = %s", (item_id,))
-        finally:
-            conn.close()
+        await execute("DELETE FROM free_itens WHERE id = %s", (item_id,))
 
         await interaction.followup.send(f"✅ Item `{item_id}` removido.", ephemeral=True)
 
+    @app_commands.command(name="free-stats", description="[ADM] Cliques e downloads dos itens gratuitos.")
+    @app_commands.describe(item_id="ID do item (ex: free_0001) — vazio mostra todos")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def free_stats(self, interaction: discord.Interaction, item_id: str = None):
+        if interaction.channel_id != CH_CONTROLE:
+            await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        filtro = "WHERE d.item_id = %s" if item_id else ""
+        rows = await fetchall(
+            f"""
+            SELECT d.item_id, f.nome,
+                   COUNT(*) FILTER (WHERE d.tipo = 'clique')   AS cliques,
+                   COUNT(*) FILTER (WHERE d.tipo = 'download') AS downloads,
+                   COUNT(DISTINCT d.user_id) FILTER (WHERE d.tipo = 'download') AS usuarios
+            FROM free_downloads d
+            LEFT JOIN free_itens f ON f.id = d.item_id
+            {filtro}
+            GROUP BY d.item_id, f.nome
+            ORDER BY downloads DESC, cliques DESC
+            LIMIT 15
+            """,
+            (item_id,) if item_id else None
+        )
+
+        embed = discord.Embed(title="📈  Estatísticas dos Downloads Free", color=COR_FREE)
+        for r in rows:
+            conversao = f" · {r['downloads'] / r['cliques']:.0%} dos cliques" if r["cliques"] else ""
+            embed.add_field(
+                name=f"🎁 {r['nome'] or '(removido)'} — `{r['item_id']}`",
+                value=f"🖱️ {r['cliques']} clique(s) · ⬇️ {r['downloads']} download(s) · "
+                      f"👤 {r['usuarios']} usuário(s){conversao}",
+                inline=False
+            )
+        if not rows:
+            embed.description = "Nenhum clique registrado ainda."
+        pendentes = downloads.pendentes(item_id)
+        embed.set_footer(
+            text=f"Ainda no buffer (gravados em até {DOWNLOADS_INTERVALO}s): "
+                 f"{pendentes[EVENTO_CLIQUE]} clique(s), {pendentes[EVENTO_DOWNLOAD]} download(s)"
+        )
+        embed.timestamp = discord.utils.utcnow()
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+    def _mensagem_item(self, item_id: str, item: dict):
+        """Embed + view da mensagem do item; com estoque zerado o botão sai desativado."""
+        esgotado = item.get("estoque") is not None and item["estoque"] <= 0
+        return self._build_embed(item_id, item), FreeView(item_id, esgotado)
+
     def _build_embed(self, item_id: str, item: dict) -> discord.Embed:
         estoque_txt = "♾️ Ilimitado" if item.get("estoque") is None else str(item["estoque"])
         embed = discord.Embed(
@@ -192,7 +206,7 @@ class Free(commands.Cog):
         return embed
 
     async def auto_setup(self, guild: discord.Guild):
-        logger.info("ℹ️ Free: views já registradas via _register_views.")
+        logger.info("ℹ️ Free: botões atendidos pelo FreeButton dinâmico.")
 
 
 async def setup(bot):
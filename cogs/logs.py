@@ -1,27 +1,71 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+from collections import deque
 import logging
 from config import *
+from envios import agendador, PRIORIDADE_MANUTENCAO
 
 logger = logging.getLogger(__name__)
 
+LOG_MAX_EMBEDS    = 10      # limite do Discord por mensagem
+LOG_MAX_CHARS     = 6000    # limite de caracteres somando todos os embeds
+LOG_INTERVALO     = 2.0     # segundos entre cada envio agrupado
+LOG_FILA_MAX      = 1000    # acima disso os logs mais antigos são descartados
+
 
 class Logs(commands.Cog):
+    # Fila compartilhada: (canal de log, embed). Os cogs só enfileiram,
+    # quem envia é o flusher abaixo, juntando até 10 embeds por mensagem.
+    _fila = deque(maxlen=LOG_FILA_MAX)
+
     def __init__(self, bot):
         self.bot = bot
+        self.flusher.start()
+
+    async def cog_unload(self):
+        self.flusher.cancel()
+        await self._flush()
 
     @staticmethod
-    async def registrar(guild: discord.Guild, titulo: str, descricao: str, cor: int = COR_INFO):
-        """Método estático para outros cogs registrarem logs facilmente."""
+    def registrar(guild: discord.Guild, titulo: str, descricao: str, cor: int = COR_INFO):
+        """Método estático para outros cogs registrarem logs facilmente.
+
+        Não envia nada na hora: o embed entra na fila e sai no próximo lote.
+        """
         canal = guild.get_channel(CH_LOGS)
         if not canal:
             return
+        if len(Logs._fila) == Logs._fila.maxlen:
+            logger.warning("⚠️ Fila de logs cheia, descartando o log mais antigo.")
         embed = discord.Embed(title=f"📋 {titulo}", description=descricao, color=cor)
         embed.timestamp = discord.utils.utcnow()
-        try:
-            await canal.send(embed=embed)
-        except Exception as e:
-            logger.error(f"Erro ao registrar log: {e}")
+        Logs._fila.append((canal, embed))
+
+    @tasks.loop(seconds=LOG_INTERVALO)
+    async def flusher(self):
+        await self._flush()
+
+    @flusher.before_loop
+    async def antes_flusher(self):
+        await self.bot.wait_until_ready()
+
+    async def _flush(self):
+        while Logs._fila:
+            canal, lote, total = Logs._fila[0][0], [], 0
+            while Logs._fila and len(lote) < LOG_MAX_EMBEDS:
+                proximo_canal, embed = Logs._fila[0]
+                if proximo_canal.id != canal.id or (lote and total + len(embed) > LOG_MAX_CHARS):
+                    break
+                Logs._fila.popleft()
+                lote.append(embed)
+                total += len(embed)
+            try:
+                await agendador.enviar(
+                    canal.id, lambda c=canal, l=lote: c.send(embeds=l),
+                    PRIORIDADE_MANUTENCAO, "log"
+                )
+            except Exception as e:
+                logger.error(f"Erro ao registrar log ({len(lote)} embed(s)): {e}")
 
     async def auto_setup(self, guild: discord.Guild):
         logger.info("ℹ️ Logs: pronto para registrar ações.")
@@ -1,34 +1,97 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 import logging
 from config import *
-from database import get_conn
+from cogs.logs import Logs
+from envios import agendador, PRIORIDADE_NORMAL
+from catalogo import catalogo
+from database import fetchone, fetchall, execute, run
+from metricas import metricas
+from dinheiro import ler_valor, formatar_valor
+from vitrine import vitrine
 
 logger = logging.getLogger(__name__)
 
 
-class CarrinhoView(discord.ui.View):
-    def __init__(self, produto_id: str):
-        super().__init__(timeout=None)
-        self.produto_id = produto_id
-        self.carrinho_btn.custom_id = f"carrinho_btn_{produto_id}"
+CARRINHO_METRICA_INTERVALO = 60   # segundos entre as leituras do tamanho dos carrinhos
+
+carrinho_itens = metricas.gauge("natan_carrinho_itens", "Itens reservados em carrinhos.")
+carrinho_usuarios = metricas.gauge("natan_carrinho_usuarios", "Usuários com carrinho não vazio.")
+
+RESERVA_OK = "ok"
+RESERVA_ESGOTADO = "esgotado"
+RESERVA_DUPLICADA = "duplicada"
 
-    @discord.ui.button(
-        label="🛒  Adicionar ao Carrinho",
-        style=discord.ButtonStyle.primary,
-        custom_id="carrinho_btn_placeholder"
+
+async def reservar_produto(user_id: str, produto_id: str) -> str:
+    """Reserva uma unidade e coloca o produto no carrinho numa única transação.
+
+    O UPDATE trava a linha do produto, então cliques simultâneos no mesmo
+    produto são serializados e o estoque nunca fica negativo.
+    """
+    def _reservar(cur):
+        cur.execute(
+            "UPDATE produtos SET estoque = estoque - 1 WHERE id = %s AND estoque > 0 RETURNING nome, valor_centavos",
+            (produto_id,)
+        )
+        produto = cur.fetchone()
+        if not produto:
+            return RESERVA_ESGOTADO
+        cur.execute(
+            "INSERT INTO carrinho (user_id, produto_id, nome, valor_centavos) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (user_id, produto_id) DO NOTHING",
+            (user_id, produto_id, produto["nome"], produto["valor_centavos"])
+        )
+        if cur.rowcount == 0:
+            # Já estava no carrinho: desfaz a baixa no estoque
+            cur.connection.rollback()
+            return RESERVA_DUPLICADA
+        return RESERVA_OK
+
+    return await run(_reservar)
+
+
+async def liberar_carrinho(user_id: str, devolver_estoque: bool = True) -> int:
+    """Esvazia o carrinho do usuário e (opcionalmente) devolve as unidades ao estoque."""
+    if not devolver_estoque:
+        return await execute("DELETE FROM carrinho WHERE user_id = %s", (user_id,))
+    row = await fetchone(
+        """
+        WITH removidos AS (
+            DELETE FROM carrinho WHERE user_id = %s RETURNING produto_id
+        ), devolvidos AS (
+            UPDATE produtos p SET estoque = p.estoque + r.qtd
+            FROM (SELECT produto_id, COUNT(*) AS qtd FROM removidos GROUP BY produto_id) r
+            WHERE p.id = r.produto_id
+        )
+        SELECT COUNT(*) AS total FROM removidos
+        """,
+        (user_id,)
     )
-    async def carrinho_btn(self, interaction: discord.Interaction, button: discord.ui.Button):
-        produto_id = interaction.data["custom_id"].replace("carrinho_btn_", "")
+    return row["total"]
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM produtos WHERE id = %s", (produto_id,))
-                produto = cur.fetchone()
-        finally:
-            conn.close()
+
+class CarrinhoButton(discord.ui.DynamicItem[discord.ui.Button], template=r"carrinho_btn_(?P<produto_id>.+)"):
+    """Botão persistente de todos os produtos: casa qualquer custom_id carrinho_btn_<id>."""
+
+    def __init__(self, produto_id: str, esgotado: bool = False):
+        super().__init__(discord.ui.Button(
+            label="❌  Esgotado" if esgotado else "🛒  Adicionar ao Carrinho",
+            style=discord.ButtonStyle.secondary if esgotado else discord.ButtonStyle.primary,
+            custom_id=f"carrinho_btn_{produto_id}",
+            disabled=esgotado
+        ))
+        self.produto_id = produto_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["produto_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        produto_id = self.produto_id
+
+        produto = await catalogo.get_produto(produto_id)
 
         if not produto:
             await interaction.response.send_message("❌ Produto não encontrado.", ephemeral=True)
@@ -38,28 +101,18 @@ class CarrinhoView(discord.ui.View):
             await interaction.response.send_message("❌ Produto fora de estoque!", ephemeral=True)
             return
 
-        user_id = str(interaction.user.id)
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1 FROM carrinho WHERE user_id = %s AND produto_id = %s", (user_id, produto_id))
-                existente = cur.fetchone()
-
-            if existente:
-                await interaction.response.send_message(
-                    "⚠️ Este produto já está no seu carrinho! Aguarde o contato do administrador.",
-                    ephemeral=True
-                )
-                return
-
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "INSERT INTO carrinho (user_id, produto_id, nome, valor) VALUES (%s, %s, %s, %s)",
-                        (user_id, produto_id, produto["nome"], produto["valor"])
-                    )
-        finally:
-            conn.close()
+        status = await reservar_produto(str(interaction.user.id), produto_id)
+
+        if status == RESERVA_ESGOTADO:
+            await interaction.response.send_message("❌ Produto fora de estoque!", ephemeral=True)
+            return
+
+        if status == RESERVA_DUPLICADA:
+            await interaction.response.send_message(
+                "⚠️ Este produto já está no seu carrinho! Aguarde o contato do administrador.",
+                ephemeral=True
+            )
+            return
 
         await interaction.response.send_message(
             f"✅ **{produto['nome']}** adicionado ao carrinho!\n"
@@ -67,41 +120,141 @@ class CarrinhoView(discord.ui.View):
             ephemeral=True
         )
 
-        canal_log = interaction.guild.get_channel(CH_LOGS)
-        if canal_log:
-            embed = discord.Embed(
-                title="🛒 Carrinho atualizado",
-                description=f"**{interaction.user.mention}** adicionou **{produto['nome']}** ao carrinho.",
-                color=COR_LOJA
+        Logs.registrar(
+            interaction.guild, "Log — Carrinho atualizado",
+            f"**{interaction.user.mention}** adicionou **{produto['nome']}** ao carrinho.",
+            COR_LOJA
+        )
+
+
+class CarrinhoView(discord.ui.View):
+    def __init__(self, produto_id: str, esgotado: bool = False):
+        super().__init__(timeout=None)
+        self.produto_id = produto_id
+        self.add_item(CarrinhoButton(produto_id, esgotado))
+
+
+CARRINHO_POR_PAGINA = 10
+CARRINHO_MAX_CAMPO  = 500   # 10 campos x 500 chars ficam abaixo do limite de 6000 do embed
+
+
+async def buscar_pagina_carrinho(apos: str = None, limite: int = CARRINHO_POR_PAGINA) -> list:
+    """Uma página de carrinhos já agrupada por usuário, paginada por keyset (user_id > apos)."""
+    filtro = "WHERE user_id > %s" if apos is not None else ""
+    params = (apos, limite) if apos is not None else (limite,)
+    return await fetchall(
+        f"""
+        SELECT user_id,
+               string_agg('• ' || nome || ' — ' || formatar_centavos(valor_centavos), E'\\n' ORDER BY nome) AS itens,
+               COUNT(*) AS qtd,
+               COALESCE(SUM(valor_centavos), 0) AS total
+        FROM carrinho
+        {filtro}
+        GROUP BY user_id
+        ORDER BY user_id
+        LIMIT %s
+        """,
+        params
+    )
+
+
+async def resolver_membros(guild: discord.Guild, user_ids: list) -> dict:
+    """Resolve vários IDs de uma vez: cache da guild e, para o resto, um único query_members."""
+    membros = {uid: m for uid in user_ids if (m := guild.get_member(uid))}
+    faltando = [uid for uid in user_ids if uid not in membros]
+    if faltando:
+        try:
+            for m in await guild.query_members(user_ids=faltando, limit=len(faltando)):
+                membros[m.id] = m
+        except Exception as e:
+            logger.warning(f"Não foi possível buscar membros fora do cache: {e}")
+    return membros
+
+
+class CarrinhoPager(discord.ui.View):
+    """Paginação do /ver-carrinho: busca uma página por vez no banco."""
+
+    def __init__(self, autor_id: int, resumo: dict):
+        super().__init__(timeout=300)
+        self.autor_id = autor_id
+        self.resumo = resumo
+        self.cursores = []      # início (apos) de cada página já vista
+        self.fim = False
+        self.ultimo_id = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.autor_id
+
+    async def carregar_pagina(self, guild: discord.Guild, apos: str) -> discord.Embed:
+        rows = await buscar_pagina_carrinho(apos, CARRINHO_POR_PAGINA + 1)
+        self.fim = len(rows) <= CARRINHO_POR_PAGINA
+        rows = rows[:CARRINHO_POR_PAGINA]
+        self.cursores.append(apos)
+        self.ultimo_id = rows[-1]["user_id"] if rows else apos
+
+        membros = await resolver_membros(guild, [int(r["user_id"]) for r in rows])
+        embed = discord.Embed(title="🛒  Carrinhos Ativos", color=COR_LOJA)
+        for r in rows:
+            member = membros.get(int(r["user_id"]))
+            nome = member.display_name if member else f"ID: {r['user_id']}"
+            itens = r["itens"]
+            if len(itens) > CARRINHO_MAX_CAMPO:
+                itens = itens[:CARRINHO_MAX_CAMPO - 1] + "…"
+            embed.add_field(
+                name=f"👤 {nome} — {r['qtd']} item(ns) · {formatar_valor(r['total'])}",
+                value=itens, inline=False
             )
-            embed.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=embed)
+        embed.set_footer(
+            text=f"Página {len(self.cursores)} · {self.resumo['usuarios']} usuário(s) · "
+                 f"{self.resumo['itens']} item(ns) · {formatar_valor(self.resumo['total'])} no total"
+        )
+        embed.timestamp = discord.utils.utcnow()
+        self.anterior.disabled = len(self.cursores) <= 1
+        self.proxima.disabled = self.fim
+        return embed
+
+    @discord.ui.button(label="◀  Anterior", style=discord.ButtonStyle.secondary)
+    async def anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursores.pop()                 # página atual
+        apos = self.cursores.pop()          # início da anterior (recarregado abaixo)
+        embed = await self.carregar_pagina(interaction.guild, apos)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Próxima  ▶", style=discord.ButtonStyle.secondary)
+    async def proxima(self, interaction: discord.Interaction, button: discord.ui.Button):
+        embed = await self.carregar_pagina(interaction.guild, self.ultimo_id)
+        await interaction.response.edit_message(embed=embed, view=self)
 
 
 class Loja(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self._register_views()
-
-    def _register_views(self):
+        # Um único registro atende os botões de todos os produtos, sem query no startup
+        bot.add_dynamic_items(CarrinhoButton)
+        vitrine.registrar(bot, "produtos", CH_LOJA, self._mensagem_produto)
+        self.medir_carrinho.start()
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(CarrinhoButton)
+        vitrine.remover("produtos")
+        self.medir_carrinho.cancel()
+
+    @tasks.loop(seconds=CARRINHO_METRICA_INTERVALO)
+    async def medir_carrinho(self):
         try:
-            conn = get_conn()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT id FROM produtos")
-                    produtos = cur.fetchall()
-            finally:
-                conn.close()
-            for p in produtos:
-                self.bot.add_view(CarrinhoView(p["id"]))
-            logger.info(f"✅ Loja: {len(produtos)} view(s) registrada(s).")
+            row = await fetchone(
+                "SELECT COUNT(*) AS itens, COUNT(DISTINCT user_id) AS usuarios FROM carrinho",
+                nome="metricas:carrinho"
+            )
+            carrinho_itens.set(row["itens"])
+            carrinho_usuarios.set(row["usuarios"])
         except Exception as e:
-            logger.error(f"Erro ao registrar views loja: {e}")
+            logger.error(f"Erro ao medir carrinhos: {e}")
 
     @app_commands.command(name="loja-add", description="[ADM] Adiciona um produto à loja.")
     @app_commands.describe(
         nome="Nome do produto", descricao="Descrição do produto",
-        valor="Valor do produto (ex: 29.90)", estoque="Quantidade em estoque",
+        valor="Valor do produto (ex: 29,90)", estoque="Quantidade em estoque",
         imagem_url="URL da imagem do produto (opcional)"
     )
     @app_commands.checks.has_permissions(administrator=True)
@@ -111,36 +264,32 @@ class Loja(commands.Cog):
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
 
+        try:
+            valor_centavos = ler_valor(valor)
+        except ValueError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+        if estoque < 0:
+            await interaction.response.send_message("❌ O estoque não pode ser negativo.", ephemeral=True)
+            return
+
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("SELECT COUNT(*) FROM produtos")
-                    count = cur.fetchone()["count"]
-                    produto_id = f"prod_{count + 1:04d}"
-                    cur.execute(
-                        "INSERT INTO produtos (id, nome, descricao, valor, estoque, imagem) VALUES (%s, %s, %s, %s, %s, %s)",
-                        (produto_id, nome, descricao, valor, estoque, imagem_url)
-                    )
-        finally:
-            conn.close()
+        # O ID (prod_0001, ...) vem do DEFAULT da coluna, gerado por sequence
+        produto_id = (await fetchone(
+            "INSERT INTO produtos (nome, descricao, valor_centavos, estoque, imagem) "
+            "VALUES (%s, %s, %s, %s, %s) RETURNING id",
+            (nome, descricao, valor_centavos, estoque, imagem_url)
+        ))["id"]
 
         canal = interaction.guild.get_channel(CH_LOJA)
-        produto = {"nome": nome, "descricao": descricao, "valor": valor, "estoque": estoque, "imagem": imagem_url}
-        embed = self._build_embed(produto_id, produto)
-        view = CarrinhoView(produto_id)
-        self.bot.add_view(view)
-        msg = await canal.send(embed=embed, view=view)
+        produto = {"nome": nome, "descricao": descricao, "valor_centavos": valor_centavos, "estoque": estoque,
+                   "imagem": imagem_url}
+        embed, view = self._mensagem_produto(produto_id, produto)
+        msg = await agendador.enviar(canal.id, lambda: canal.send(embed=embed, view=view), PRIORIDADE_NORMAL, "produto")
+        vitrine.exibido("produtos", produto_id, estoque)
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("UPDATE produtos SET msg_id = %s WHERE id = %s", (msg.id, produto_id))
-        finally:
-            conn.close()
+        await execute("UPDATE produtos SET msg_id = %s WHERE id = %s", (msg.id, produto_id))
 
         await interaction.followup.send(f"✅ Produto **{nome}** adicionado! (ID: `{produto_id}`)", ephemeral=True)
 
@@ -154,13 +303,7 @@ class Loja(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM produtos WHERE id = %s", (produto_id,))
-                produto = cur.fetchone()
-        finally:
-            conn.close()
+        produto = await fetchone("SELECT * FROM produtos WHERE id = %s", (produto_id,))
 
         if not produto:
             await interaction.followup.send("❌ Produto não encontrado.", ephemeral=True)
@@ -169,18 +312,12 @@ class Loja(commands.Cog):
         canal = interaction.guild.get_channel(CH_LOJA)
         if produto["msg_id"] and canal:
             try:
-                msg = await canal.fetch_message(produto["msg_id"])
-                await msg.delete()
+                msg = canal.get_partial_message(produto["msg_id"])
+                await agendador.enviar(canal.id, msg.delete, PRIORIDADE_NORMAL, "remover produto")
             except Exception:
                 pass
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("DELETE FROM produtos WHERE id = %s", (produto_id,))
-        finally:
-            conn.close()
+        await execute("DELETE FROM produtos WHERE id = %s", (produto_id,))
 
         await interaction.followup.send(f"✅ Produto `{produto_id}` removido.", ephemeral=True)
 
@@ -191,57 +328,66 @@ class Loja(commands.Cog):
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM carrinho ORDER BY user_id")
-                itens = cur.fetchall()
-        finally:
-            conn.close()
-
-        if not itens:
-            await interaction.response.send_message("🛒 Nenhum item nos carrinhos no momento.", ephemeral=True)
-            return
-
-        embed = discord.Embed(title="🛒  Carrinhos Ativos", color=COR_LOJA)
-        agrupado = {}
-        for item in itens:
-            agrupado.setdefault(item["user_id"], []).append(item)
+        await interaction.response.defer(ephemeral=True)
 
-        for uid, lista in agrupado.items():
-            member = interaction.guild.get_member(int(uid))
-            nome = member.display_name if member else f"ID: {uid}"
-            valor_lista = "\n".join([f"• {i['nome']} — R$ {i['valor']}" for i in lista])
-            embed.add_field(name=f"👤 {nome}", value=valor_lista, inline=False)
+        resumo = await fetchone(
+            "SELECT COUNT(DISTINCT user_id) AS usuarios, COUNT(*) AS itens, "
+            "COALESCE(SUM(valor_centavos), 0) AS total FROM carrinho"
+        )
+        if not resumo["itens"]:
+            await interaction.followup.send("🛒 Nenhum item nos carrinhos no momento.", ephemeral=True)
+            return
 
-        embed.timestamp = discord.utils.utcnow()
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        pager = CarrinhoPager(interaction.user.id, resumo)
+        embed = await pager.carregar_pagina(interaction.guild, None)
+        await interaction.followup.send(embed=embed, view=pager, ephemeral=True)
 
     @app_commands.command(name="limpar-carrinho", description="[ADM] Limpa o carrinho de um usuário após venda.")
-    @app_commands.describe(usuario="Usuário para limpar o carrinho")
+    @app_commands.describe(
+        usuario="Usuário para limpar o carrinho",
+        devolver_estoque="Devolver as unidades reservadas ao estoque? (não, se a venda foi concluída)"
+    )
     @app_commands.checks.has_permissions(administrator=True)
-    async def limpar_carrinho(self, interaction: discord.Interaction, usuario: discord.Member):
+    async def limpar_carrinho(self, interaction: discord.Interaction, usuario: discord.Member,
+                              devolver_estoque: bool = True):
         if interaction.channel_id != CH_CONTROLE:
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("DELETE FROM carrinho WHERE user_id = %s", (str(usuario.id),))
-        finally:
-            conn.close()
+        await liberar_carrinho(str(usuario.id), devolver_estoque)
 
         await interaction.response.send_message(f"✅ Carrinho de {usuario.mention} limpo.", ephemeral=True)
 
+    @app_commands.command(name="catalogo-status", description="[ADM] Mostra as estatísticas do cache do catálogo.")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def catalogo_status(self, interaction: discord.Interaction):
+        if interaction.channel_id != CH_CONTROLE:
+            await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
+            return
+
+        stats = catalogo.stats()
+        embed = discord.Embed(title="🗃️  Cache do Catálogo", color=COR_INFO)
+        embed.add_field(name="✅  Hits", value=str(stats["hits"]), inline=True)
+        embed.add_field(name="❌  Misses", value=str(stats["misses"]), inline=True)
+        embed.add_field(name="📈  Taxa de acerto", value=f"{stats['hit_ratio']:.1%}", inline=True)
+        embed.add_field(name="🛍️  Produtos", value=str(stats["produtos"]), inline=True)
+        embed.add_field(name="🎁  Itens free", value=str(stats["free_itens"]), inline=True)
+        embed.add_field(name="♻️  Invalidações", value=str(stats["invalidacoes"]), inline=True)
+        embed.add_field(name="👂  LISTEN ativo", value="Sim" if stats["escutando"] else "Não", inline=True)
+        embed.timestamp = discord.utils.utcnow()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    def _mensagem_produto(self, produto_id: str, produto: dict):
+        """Embed + view da mensagem do produto; com estoque zerado o botão sai desativado."""
+        return self._build_embed(produto_id, produto), CarrinhoView(produto_id, produto["estoque"] <= 0)
+
     def _build_embed(self, produto_id: str, produto: dict) -> discord.Embed:
         embed = discord.Embed(
             title=f"🛍️  {produto['nome']}",
             description=produto["descricao"],
             color=COR_LOJA
         )
-        embed.add_field(name="💰  Valor", value=f"R$ {produto['valor']}", inline=True)
+        embed.add_field(name="💰  Valor", value=formatar_valor(produto["valor_centavos"]), inline=True)
         embed.add_field(name="📦  Estoque", value=str(produto["estoque"]), inline=True)
         embed.add_field(name="🆔  ID", value=produto_id, inline=True)
         if produto.get("imagem"):
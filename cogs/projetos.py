@@ -3,7 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 import logging
 from config import *
-from database import get_conn
+from database import fetchone, execute
+from envios import agendador, PRIORIDADE_NORMAL
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +28,8 @@ class Projetos(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT COUNT(*) FROM projetos")
-                count = cur.fetchone()["count"]
-                projeto_id = f"proj_{count + 1:04d}"
-        finally:
-            conn.close()
+        # Reserva o próximo ID da sequence (lacunas são aceitáveis, repetições não)
+        projeto_id = (await fetchone("SELECT proximo_id('proj_', 'projetos_id_seq') AS id"))["id"]
 
         canal = interaction.guild.get_channel(CH_PROJETOS)
         if not canal:
@@ -54,18 +49,12 @@ class Projetos(commands.Cog):
             icon_url=interaction.guild.icon.url if interaction.guild.icon else None
         )
         embed.timestamp = discord.utils.utcnow()
-        msg = await canal.send(embed=embed)
-
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "INSERT INTO projetos (id, nome, descricao, url, imagem, cliente, msg_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                        (projeto_id, nome, descricao, url, imagem_url, cliente, msg.id)
-                    )
-        finally:
-            conn.close()
+        msg = await agendador.enviar(canal.id, lambda: canal.send(embed=embed), PRIORIDADE_NORMAL, "projeto")
+
+        await execute(
+            "INSERT INTO projetos (id, nome, descricao, url, imagem, cliente, msg_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            (projeto_id, nome, descricao, url, imagem_url, cliente, msg.id)
+        )
 
         await interaction.followup.send(f"✅ Projeto **{nome}** adicionado! (ID: `{projeto_id}`)", ephemeral=True)
 
@@ -79,13 +68,7 @@ class Projetos(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
-        conn = get_conn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT * FROM projetos WHERE id = %s", (projeto_id,))
-                projeto = cur.fetchone()
-        finally:
-            conn.close()
+        projeto = await fetchone("SELECT * FROM projetos WHERE id = %s", (projeto_id,))
 
         if not projeto:
             await interaction.followup.send("❌ Projeto não encontrado.", ephemeral=True)
@@ -94,18 +77,12 @@ class Projetos(commands.Cog):
         canal = interaction.guild.get_channel(CH_PROJETOS)
         if projeto["msg_id"] and canal:
             try:
-                msg = await canal.fetch_message(projeto["msg_id"])
-                await msg.delete()
+                msg = canal.get_partial_message(projeto["msg_id"])
+                await agendador.enviar(canal.id, msg.delete, PRIORIDADE_NORMAL, "remover projeto")
             except Exception:
                 pass
 
-        conn = get_conn()
-        try:
-            with conn:
-                with conn.cursor() as cur:
-                    cur.execute("DELETE FROM projetos WHERE id = %s", (projeto_id,))
-        finally:
-            conn.close()
+        await execute("DELETE FROM projetos WHERE id = %s", (projeto_id,))
 
         await interaction.followup.send(f"✅ Projeto `{projeto_id}` removido.", ephemeral=True)
 
@@ -1,8 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import logging, asyncio
+import logging
 from config import *
+from fixas import publicar_fixa
+from modelos import modelos
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +13,9 @@ REGRAS_EMBED_MARKER = "NATANDEV_REGRAS_EMBED"  # marcador invisível para identi
 class Regras(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        modelos.registrar("regras", self.build_embed)
 
-    def build_embed(self) -> discord.Embed:
+    def build_embed(self, guild: discord.Guild = None) -> discord.Embed:
         embed = discord.Embed(
             title="📜  Regras do Servidor NatanSites",
             description=(
@@ -68,26 +71,20 @@ class Regras(commands.Cog):
         # Marcador invisível no footer para identificar essa mensagem depois
         return embed
 
-    async def enviar_regras(self, guild: discord.Guild):
-        """Apaga embed antigo e envia novo embed de regras"""
+    async def enviar_regras(self, guild: discord.Guild, forcar: bool = False):
+        """Mantém o embed de regras atualizado (edita no lugar; só reenvia se sumiu)"""
         canal = guild.get_channel(CH_REGRAS)
         if not canal:
             logger.warning("⚠️ Canal de regras não encontrado.")
             return
 
-        # Apaga mensagens antigas do bot no canal
+        embed = modelos.embed("regras", carimbar=False)
         try:
-            async for msg in canal.history(limit=50):
-                if msg.author == self.bot.user:
-                    await msg.delete()
-                    await asyncio.sleep(0.3)
-        except Exception as e:
-            logger.error(f"Erro ao limpar canal de regras: {e}")
-
-        embed = self.build_embed()
-        try:
-            await canal.send(content="@everyone @here", embed=embed)
-            logger.info("✅ Embed de regras enviado.")
+            resultado = await publicar_fixa(
+                self.bot, "regras", canal, content="@everyone @here", embed=embed,
+                forcar=forcar, hash_=modelos.hash("regras", content="@everyone @here")
+            )
+            logger.info(f"✅ Embed de regras: {resultado}.")
         except Exception as e:
             logger.error(f"Erro ao enviar embed de regras: {e}")
 
@@ -107,7 +104,7 @@ class Regras(commands.Cog):
             return
 
         await interaction.response.defer(ephemeral=True)
-        await self.enviar_regras(interaction.guild)
+        await self.enviar_regras(interaction.guild, forcar=True)
         await interaction.followup.send("✅ Embed de regras atualizado com sucesso!", ephemeral=True)
 
     @setup_regras.error
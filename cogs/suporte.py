@@ -3,10 +3,114 @@ from discord.ext import commands
 from discord import app_commands
 import logging, asyncio
 from config import *
+from cogs.logs import Logs
+from envios import agendador, PRIORIDADE_USUARIO, PRIORIDADE_NORMAL
+from fixas import publicar_fixa
+from modelos import modelos
+from database import fetchall, execute
+from metricas import metricas
 
 logger = logging.getLogger(__name__)
 
 
+# ── Registro de tickets abertos ──────────────────────────────────────
+
+class RegistroTickets:
+    """Índice em memória usuário → canal dos tickets abertos, espelhado na tabela tickets."""
+
+    def __init__(self):
+        self._por_usuario = {}
+        self._por_canal = {}
+        self._criando = set()   # usuários com ticket sendo criado agora
+
+    async def carregar(self):
+        rows = await fetchall("SELECT user_id, channel_id FROM tickets WHERE status = 'aberto'")
+        self._por_usuario = {r["user_id"]: r["channel_id"] for r in rows}
+        self._por_canal = {r["channel_id"]: r["user_id"] for r in rows}
+        logger.info(f"✅ Suporte: {len(rows)} ticket(s) aberto(s) carregado(s).")
+
+    def canal_de(self, user_id: int):
+        return self._por_usuario.get(user_id)
+
+    def canais_abertos(self) -> list:
+        return list(self._por_canal)
+
+    def reservar(self, user_id: int) -> bool:
+        """Marca que o usuário está abrindo um ticket; False se já tem um (ou está criando)."""
+        if user_id in self._por_usuario or user_id in self._criando:
+            return False
+        self._criando.add(user_id)
+        return True
+
+    def liberar(self, user_id: int):
+        self._criando.discard(user_id)
+
+    async def abrir(self, user_id: int, channel_id: int):
+        try:
+            await execute(
+                "INSERT INTO tickets (channel_id, user_id, status) VALUES (%s, %s, 'aberto')",
+                (channel_id, user_id)
+            )
+            self._por_usuario[user_id] = channel_id
+            self._por_canal[channel_id] = user_id
+        finally:
+            self._criando.discard(user_id)
+
+    async def fechar(self, channel_id: int) -> bool:
+        user_id = self._por_canal.pop(channel_id, None)
+        if user_id is None:
+            return False
+        self._por_usuario.pop(user_id, None)
+        await execute(
+            "UPDATE tickets SET status = 'fechado', closed_at = CURRENT_TIMESTAMP "
+            "WHERE channel_id = %s AND status = 'aberto'",
+            (channel_id,)
+        )
+        return True
+
+
+registro_tickets = RegistroTickets()
+metricas.gauge("natan_tickets_abertos", "Tickets de suporte abertos.",
+               funcao=lambda: len(registro_tickets.canais_abertos()))
+
+
+# ── Permissões dos canais de ticket ──────────────────────────────────
+
+PERM_TICKET = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_message_history=True)
+PERM_OCULTO = discord.PermissionOverwrite(view_channel=False)
+
+
+class ModeloOverwrites:
+    """Overwrites base dos tickets (@everyone oculto + cargos admin), montados uma vez por guild.
+
+    Só são recalculados quando um cargo admin é criado, alterado ou apagado.
+    """
+
+    def __init__(self):
+        self._por_guild = {}
+
+    def base(self, guild: discord.Guild) -> dict:
+        modelo = self._por_guild.get(guild.id)
+        if modelo is None:
+            modelo = {guild.default_role: PERM_OCULTO}
+            for role in guild.roles:
+                if role.permissions.administrator:
+                    modelo[role] = PERM_TICKET
+            self._por_guild[guild.id] = modelo
+        return modelo
+
+    def para_ticket(self, guild: discord.Guild, user: discord.Member) -> dict:
+        overwrites = dict(self.base(guild))
+        overwrites[user] = PERM_TICKET
+        return overwrites
+
+    def invalidar(self, guild_id: int):
+        self._por_guild.pop(guild_id, None)
+
+
+modelo_overwrites = ModeloOverwrites()
+
+
 # ── View do canal de ticket ──────────────────────────────────────────
 
 class FecharTicketView(discord.ui.View):
@@ -27,22 +131,21 @@ class FecharTicketView(discord.ui.View):
         await interaction.response.send_message("🔒 Fechando ticket em 5 segundos...")
         await asyncio.sleep(5)
 
+        await registro_tickets.fechar(interaction.channel.id)
+
         # Log antes de deletar
-        canal_log = interaction.guild.get_channel(CH_LOGS)
-        if canal_log:
-            embed = discord.Embed(
-                title="📋 Log — Ticket Fechado",
-                description=(
-                    f"**Canal:** {interaction.channel.name}\n"
-                    f"**Fechado por:** {interaction.user.mention}"
-                ),
-                color=COR_ERRO
-            )
-            embed.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=embed)
+        Logs.registrar(
+            interaction.guild, "Log — Ticket Fechado",
+            f"**Canal:** {interaction.channel.name}\n**Fechado por:** {interaction.user.mention}",
+            COR_ERRO
+        )
 
         try:
-            await interaction.channel.delete(reason=f"Ticket fechado por {interaction.user.display_name}")
+            canal = interaction.channel
+            await agendador.enviar(
+                canal.id, lambda: canal.delete(reason=f"Ticket fechado por {interaction.user.display_name}"),
+                PRIORIDADE_NORMAL, "fechar ticket"
+            )
         except Exception as e:
             logger.error(f"Erro ao fechar ticket: {e}")
 
@@ -62,42 +165,62 @@ class SuporteView(discord.ui.View):
         guild = interaction.guild
         user = interaction.user
 
-        # Verifica se usuário já tem ticket aberto
-        ticket_nome = f"ticket-{user.name.lower().replace(' ', '-')}"
-        canal_existente = discord.utils.get(guild.channels, name=ticket_nome)
-        if canal_existente:
-            await interaction.response.send_message(
-                f"⚠️ Você já tem um ticket aberto: {canal_existente.mention}", ephemeral=True
-            )
+        # Verifica se usuário já tem ticket aberto (busca O(1) pelo ID, não pelo nome)
+        canal_id = registro_tickets.canal_de(user.id)
+        if canal_id:
+            canal_existente = guild.get_channel(canal_id)
+            if canal_existente:
+                await interaction.response.send_message(
+                    f"⚠️ Você já tem um ticket aberto: {canal_existente.mention}", ephemeral=True
+                )
+                return
+            # Canal sumiu sem passar pelo evento de delete: fecha o registro órfão
+            await registro_tickets.fechar(canal_id)
+
+        if not registro_tickets.reservar(user.id):
+            await interaction.response.send_message("⚠️ Seu ticket já está sendo criado.", ephemeral=True)
             return
 
-        await interaction.response.send_message("✅ Criando seu ticket...", ephemeral=True)
+        ticket_nome = f"ticket-{user.name.lower().replace(' ', '-')}"
 
-        # Permissões do canal de ticket
-        categoria = guild.get_channel(CAT_SUPORTE)
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            user: discord.PermissionOverwrite(
-                view_channel=True, send_messages=True, read_message_history=True
-            ),
-        }
-        # Adiciona permissão para admins
-        for role in guild.roles:
-            if role.permissions.administrator:
-                overwrites[role] = discord.PermissionOverwrite(
-                    view_channel=True, send_messages=True, read_message_history=True
+        # Da reserva até o registro no banco: qualquer erro libera o usuário para tentar de novo
+        try:
+            await interaction.response.send_message("✅ Criando seu ticket...", ephemeral=True)
+
+            # Permissões do canal de ticket (modelo pronto + o usuário)
+            categoria = guild.get_channel(CAT_SUPORTE)
+            overwrites = modelo_overwrites.para_ticket(guild, user)
+
+            try:
+                ticket_canal = await agendador.enviar(
+                    guild.id,
+                    lambda: guild.create_text_channel(
+                        name=ticket_nome,
+                        category=categoria,
+                        overwrites=overwrites,
+                        reason=f"Ticket aberto por {user.display_name}"
+                    ),
+                    PRIORIDADE_USUARIO, "criar ticket"
                 )
+            except Exception as e:
+                logger.error(f"Erro ao criar canal de ticket: {e}")
+                return
 
-        try:
-            ticket_canal = await guild.create_text_channel(
-                name=ticket_nome,
-                category=categoria,
-                overwrites=overwrites,
-                reason=f"Ticket aberto por {user.display_name}"
-            )
-        except Exception as e:
-            logger.error(f"Erro ao criar canal de ticket: {e}")
-            return
+            try:
+                await registro_tickets.abrir(user.id, ticket_canal.id)
+            except Exception as e:
+                # Sem registro o canal ficaria órfão: apaga e deixa o usuário tentar de novo
+                logger.error(f"Erro ao registrar o ticket de {user.display_name}: {e}")
+                try:
+                    await agendador.enviar(
+                        guild.id, lambda: ticket_canal.delete(reason="Falha ao registrar o ticket"),
+                        PRIORIDADE_USUARIO, "apagar ticket não registrado"
+                    )
+                except Exception as e:
+                    logger.error(f"Erro ao apagar o canal de ticket não registrado: {e}")
+                return
+        finally:
+            registro_tickets.liberar(user.id)
 
         # Envia mensagem inicial no ticket
         embed = discord.Embed(
@@ -115,19 +238,18 @@ class SuporteView(discord.ui.View):
         embed.set_footer(text="NatanSites | Suporte Técnico")
         embed.timestamp = discord.utils.utcnow()
 
-        view = FecharTicketView()
-        await ticket_canal.send(content=f"{user.mention}", embed=embed, view=view)
+        view = modelos.view("fechar_ticket")
+        await agendador.enviar(
+            ticket_canal.id, lambda: ticket_canal.send(content=f"{user.mention}", embed=embed, view=view),
+            PRIORIDADE_USUARIO, "mensagem do ticket"
+        )
 
         # Log
-        canal_log = guild.get_channel(CH_LOGS)
-        if canal_log:
-            log = discord.Embed(
-                title="📋 Log — Ticket Aberto",
-                description=f"**Usuário:** {user.mention}\n**Canal:** {ticket_canal.mention}",
-                color=COR_SUPORTE
-            )
-            log.timestamp = discord.utils.utcnow()
-            await canal_log.send(embed=log)
+        Logs.registrar(
+            guild, "Log — Ticket Aberto",
+            f"**Usuário:** {user.mention}\n**Canal:** {ticket_canal.mention}",
+            COR_SUPORTE
+        )
 
 
 # ── Cog Principal ────────────────────────────────────────────────────
@@ -135,25 +257,43 @@ class SuporteView(discord.ui.View):
 class Suporte(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Registra views persistentes para sobreviver a reinicializações
-        bot.add_view(SuporteView())
-        bot.add_view(FecharTicketView())
+        # Registra views persistentes para sobreviver a reinicializações;
+        # as mesmas instâncias são reaproveitadas em todos os envios
+        bot.add_view(modelos.registrar_view("suporte", SuporteView()))
+        bot.add_view(modelos.registrar_view("fechar_ticket", FecharTicketView()))
+        modelos.registrar("suporte", self.build_embed)
 
-    async def enviar_suporte(self, guild: discord.Guild):
-        """Apaga mensagem antiga do bot e envia embed fixo de suporte"""
-        canal = guild.get_channel(CH_SUPORTE)
-        if not canal:
-            return
+    async def cog_load(self):
+        await registro_tickets.carregar()
 
-        # Limpa mensagens antigas do bot
-        try:
-            async for msg in canal.history(limit=20):
-                if msg.author == self.bot.user:
-                    await msg.delete()
-                    await asyncio.sleep(0.3)
-        except Exception as e:
-            logger.error(f"Erro ao limpar canal suporte: {e}")
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        # O embed de suporte usa o ícone do servidor como thumbnail
+        if before.icon != after.icon:
+            modelos.invalidar("suporte", after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        if role.permissions.administrator:
+            modelo_overwrites.invalidar(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        if before.permissions.administrator != after.permissions.administrator:
+            modelo_overwrites.invalidar(after.guild.id)
 
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        if role.permissions.administrator:
+            modelo_overwrites.invalidar(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # Ticket apagado manualmente (sem o botão de fechar)
+        if await registro_tickets.fechar(channel.id):
+            logger.info(f"ℹ️ Ticket {channel.name} apagado manualmente, registro fechado.")
+
+    def build_embed(self, guild: discord.Guild) -> discord.Embed:
         embed = discord.Embed(
             title="🛠️  Central de Suporte — NatanSites",
             description=(
@@ -176,13 +316,26 @@ class Suporte(commands.Cog):
             inline=False
         )
         embed.set_footer(text="NatanSites | Serviço de Sites")
-        embed.timestamp = discord.utils.utcnow()
+        return embed
+
+    async def enviar_suporte(self, guild: discord.Guild, forcar: bool = False):
+        """Mantém o embed fixo de suporte atualizado (edita no lugar; só reenvia se sumiu)"""
+        canal = guild.get_channel(CH_SUPORTE)
+        if not canal:
+            return
 
-        view = SuporteView()
-        await canal.send(embed=embed, view=view)
-        logger.info("✅ Embed de suporte enviado.")
+        embed = modelos.embed("suporte", guild)
+        resultado = await publicar_fixa(
+            self.bot, "suporte", canal, embed=embed, view=modelos.view("suporte"), forcar=forcar,
+            hash_=modelos.hash("suporte", guild, view="suporte")
+        )
+        logger.info(f"✅ Embed de suporte: {resultado}.")
 
     async def auto_setup(self, guild: discord.Guild):
+        # Fecha tickets cujo canal foi apagado enquanto o bot estava offline
+        for channel_id in registro_tickets.canais_abertos():
+            if not guild.get_channel(channel_id):
+                await registro_tickets.fechar(channel_id)
         await self.enviar_suporte(guild)
 
     @app_commands.command(name="setup-suporte", description="[ADM] Reenvia o embed de suporte com botão.")
@@ -192,7 +345,7 @@ class Suporte(commands.Cog):
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
         await interaction.response.defer(ephemeral=True)
-        await self.enviar_suporte(interaction.guild)
+        await self.enviar_suporte(interaction.guild, forcar=True)
         await interaction.followup.send("✅ Embed de suporte atualizado!", ephemeral=True)
 
 
@@ -1,8 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import random, logging, asyncio
+import random, logging
 from config import *
+from fixas import publicar_fixa
+from modelos import modelos
 
 logger = logging.getLogger(__name__)
 
@@ -53,22 +55,11 @@ class ZoacaoView(discord.ui.View):
 class Zoacao(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        bot.add_view(ZoacaoView())
-
-    async def enviar_zoacao(self, guild: discord.Guild):
-        """Apaga mensagem antiga e envia embed fixo de zoação"""
-        canal = guild.get_channel(CH_ZOACAO)
-        if not canal:
-            return
-
-        try:
-            async for msg in canal.history(limit=20):
-                if msg.author == self.bot.user:
-                    await msg.delete()
-                    await asyncio.sleep(0.3)
-        except Exception as e:
-            logger.error(f"Erro ao limpar canal zoação: {e}")
+        # Uma única instância da view serve para registro e para todos os envios
+        bot.add_view(modelos.registrar_view("zoacao", ZoacaoView()))
+        modelos.registrar("zoacao", self.build_embed)
 
+    def build_embed(self, guild: discord.Guild = None) -> discord.Embed:
         embed = discord.Embed(
             title="😂  Modo Zoação Ativado!",
             description=(
@@ -80,11 +71,20 @@ class Zoacao(commands.Cog):
             color=COR_ZOACAO
         )
         embed.set_footer(text="NatanSites | Canal de Diversão")
-        embed.timestamp = discord.utils.utcnow()
+        return embed
 
-        view = ZoacaoView()
-        await canal.send(embed=embed, view=view)
-        logger.info("✅ Embed de zoação enviado.")
+    async def enviar_zoacao(self, guild: discord.Guild, forcar: bool = False):
+        """Mantém o embed fixo de zoação atualizado (edita no lugar; só reenvia se sumiu)"""
+        canal = guild.get_channel(CH_ZOACAO)
+        if not canal:
+            return
+
+        embed = modelos.embed("zoacao", guild)
+        resultado = await publicar_fixa(
+            self.bot, "zoacao", canal, embed=embed, view=modelos.view("zoacao"), forcar=forcar,
+            hash_=modelos.hash("zoacao", guild, view="zoacao")
+        )
+        logger.info(f"✅ Embed de zoação: {resultado}.")
 
     async def auto_setup(self, guild: discord.Guild):
         await self.enviar_zoacao(guild)
@@ -96,7 +96,7 @@ class Zoacao(commands.Cog):
             await interaction.response.send_message(f"❌ Use no canal <#{CH_CONTROLE}>.", ephemeral=True)
             return
         await interaction.response.defer(ephemeral=True)
-        await self.enviar_zoacao(interaction.guild)
+        await self.enviar_zoacao(interaction.guild, forcar=True)
         await interaction.followup.send("✅ Embed de zoação atualizado!", ephemeral=True)
 
     @app_commands.command(name="zoacao-add", description="[ADM] Adiciona uma nova frase de zoação à lista.")
@@ -45,6 +45,32 @@ CH_FREE          = 1475154302711627998
 ROLE_ADMIN       = 1412977709084311582
 ROLE_FUNDADOR    = 1412977490745491456
 
+# ─────────────────────────────────────────
+# 🔄 SINCRONIZAÇÃO DOS SLASH COMMANDS
+# ─────────────────────────────────────────
+# SYNC_GUILD=1 → sincroniza só no GUILD_ID (aparece na hora) em vez de global
+SYNC_SOMENTE_GUILD = os.environ.get("SYNC_GUILD") == "1"
+# FORCE_SYNC=1 → sincroniza mesmo que os comandos não tenham mudado
+SYNC_FORCAR        = os.environ.get("FORCE_SYNC") == "1"
+
+# ─────────────────────────────────────────
+# 🚪 ENTRADAS EM MASSA (raid / link viral)
+# ─────────────────────────────────────────
+# A partir de BURST_LIMIAR entradas em BURST_JANELA segundos, as boas-vindas
+# passam a sair agrupadas (uma mensagem por BURST_INTERVALO segundos)
+BURST_LIMIAR       = int(os.environ.get("BURST_LIMIAR", "5"))
+BURST_JANELA       = float(os.environ.get("BURST_JANELA", "10"))
+BURST_INTERVALO    = float(os.environ.get("BURST_INTERVALO", "10"))
+
+# ─────────────────────────────────────────
+# ⬇️ DOWNLOADS FREE (links /d/<item>/<token>)
+# ─────────────────────────────────────────
+# Endereço público do servidor web embutido (no Render: RENDER_EXTERNAL_URL).
+# Sem ele, o botão Free mostra o link direto, como antes.
+URL_PUBLICA        = (os.environ.get("URL_PUBLICA") or os.environ.get("RENDER_EXTERNAL_URL") or "").rstrip("/")
+# Validade do link de download gerado ao clicar no botão (segundos)
+DOWNLOAD_VALIDADE  = int(os.environ.get("DOWNLOAD_VALIDADE", "86400"))
+
 # ─────────────────────────────────────────
 # 🎨 CORES DOS EMBEDS
 # ─────────────────────────────────────────
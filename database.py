@@ -1,91 +1,422 @@
 # ============================================================
 #   database.py — PostgreSQL (Render persiste os dados!)
 #   Variável de ambiente: DATABASE_URL
+#
+#   Pool de conexões compartilhado por todos os cogs. As consultas
+#   rodam em threads (asyncio.to_thread) para não travar o event loop.
+#   Variáveis opcionais: DB_POOL_MIN, DB_POOL_MAX, DB_ACQUIRE_TIMEOUT
 # ============================================================
 import os
+import asyncio
 import logging
+import re
+import time
+from contextlib import asynccontextmanager
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from metricas import db_consultas, db_duracao
 
 logger = logging.getLogger(__name__)
 
-def get_conn():
-    """Retorna conexão com o PostgreSQL via DATABASE_URL."""
+DB_POOL_MIN        = int(os.environ.get("DB_POOL_MIN", "1"))
+DB_POOL_MAX        = int(os.environ.get("DB_POOL_MAX", "10"))
+DB_ACQUIRE_TIMEOUT = float(os.environ.get("DB_ACQUIRE_TIMEOUT", "5"))
+
+_pool = None
+_pool_sem = None
+_pool_max = 0
+_em_uso = 0
+_esperando = 0
+
+
+def _database_url() -> str:
     url = os.environ.get("DATABASE_URL")
     if not url:
         raise RuntimeError("❌ Variável DATABASE_URL não definida!")
     # psycopg2 não aceita "postgres://", precisa ser "postgresql://"
     if url.startswith("postgres://"):
         url = url.replace("postgres://", "postgresql://", 1)
-    conn = psycopg2.connect(url, cursor_factory=psycopg2.extras.RealDictCursor)
-    return conn
+    return url
 
-def init_db():
-    """Cria todas as tabelas se não existirem."""
-    conn = get_conn()
+def get_conn():
+    """Retorna uma conexão avulsa (fora do pool) com o PostgreSQL via DATABASE_URL."""
+    return psycopg2.connect(_database_url(), cursor_factory=psycopg2.extras.RealDictCursor)
+
+# ── Pool ──────────────────────────────────────────────────────────────
+
+async def init_pool(minconn: int = DB_POOL_MIN, maxconn: int = DB_POOL_MAX):
+    """Abre o pool de conexões. Chamado uma vez no setup_hook do bot."""
+    global _pool, _pool_sem, _pool_max
+    if _pool is not None:
+        return
+    _pool_max = maxconn
+    _pool = await asyncio.to_thread(
+        psycopg2.pool.ThreadedConnectionPool, minconn, maxconn,
+        _database_url(), cursor_factory=psycopg2.extras.RealDictCursor
+    )
+    _pool_sem = asyncio.Semaphore(maxconn)
+    logger.info(f"✅ Pool PostgreSQL iniciado (min={minconn}, max={maxconn}).")
+
+async def close_pool():
+    global _pool, _pool_sem
+    if _pool is None:
+        return
+    pool, _pool, _pool_sem = _pool, None, None
+    await asyncio.to_thread(pool.closeall)
+    logger.info("🔌 Pool PostgreSQL encerrado.")
+
+@asynccontextmanager
+async def acquire(timeout: float = None):
+    """Empresta uma conexão do pool, esperando no máximo `timeout` segundos."""
+    global _em_uso, _esperando
+    if _pool is None:
+        raise RuntimeError("❌ Pool do banco não iniciado! Chame init_pool() antes.")
+    pool, sem = _pool, _pool_sem
+    _esperando += 1
     try:
-        with conn:
-            with conn.cursor() as cur:
-                cur.execute("""
-                -- ── LOJA ─────────────────────────────────────────────
-                CREATE TABLE IF NOT EXISTS produtos (
-                    id        TEXT PRIMARY KEY,
-                    nome      TEXT NOT NULL,
-                    descricao TEXT NOT NULL,
-                    valor     TEXT NOT NULL,
-                    estoque   INTEGER NOT NULL DEFAULT 0,
-                    imagem    TEXT,
-                    msg_id    BIGINT
-                );
-
-                CREATE TABLE IF NOT EXISTS carrinho (
-                    user_id    TEXT NOT NULL,
-                    produto_id TEXT NOT NULL,
-                    nome       TEXT NOT NULL,
-                    valor      TEXT NOT NULL,
-                    PRIMARY KEY (user_id, produto_id)
-                );
-
-                -- ── COMPRAS ───────────────────────────────────────────
-                CREATE TABLE IF NOT EXISTS compras (
-                    id         TEXT PRIMARY KEY,
-                    usuario_id BIGINT NOT NULL,
-                    produto    TEXT NOT NULL,
-                    valor      TEXT NOT NULL,
-                    observacao TEXT,
-                    criado_em  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
-
-                CREATE TABLE IF NOT EXISTS compras_contador (
-                    id    INTEGER PRIMARY KEY CHECK (id = 1),
-                    valor INTEGER NOT NULL DEFAULT 0
-                );
-                INSERT INTO compras_contador (id, valor)
-                VALUES (1, 0)
-                ON CONFLICT (id) DO NOTHING;
-
-                -- ── PROJETOS ──────────────────────────────────────────
-                CREATE TABLE IF NOT EXISTS projetos (
-                    id        TEXT PRIMARY KEY,
-                    nome      TEXT NOT NULL,
-                    descricao TEXT NOT NULL,
-                    url       TEXT,
-                    imagem    TEXT,
-                    cliente   TEXT,
-                    msg_id    BIGINT
-                );
-
-                -- ── FREE ──────────────────────────────────────────────
-                CREATE TABLE IF NOT EXISTS free_itens (
-                    id        TEXT PRIMARY KEY,
-                    nome      TEXT NOT NULL,
-                    descricao TEXT NOT NULL,
-                    link      TEXT NOT NULL,
-                    estoque   INTEGER,
-                    imagem    TEXT,
-                    msg_id    BIGINT
-                );
-                """)
-        logger.info("✅ Banco de dados PostgreSQL iniciado.")
+        await asyncio.wait_for(sem.acquire(), timeout or DB_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise RuntimeError("❌ Tempo esgotado aguardando conexão livre no pool do banco.")
     finally:
-        conn.close()
+        _esperando -= 1
+    try:
+        conn = await asyncio.to_thread(pool.getconn)
+    except Exception:
+        sem.release()
+        raise
+    _em_uso += 1
+    try:
+        yield conn
+    finally:
+        _em_uso -= 1
+        try:
+            await asyncio.to_thread(pool.putconn, conn, close=bool(conn.closed))
+        finally:
+            sem.release()
+
+def pool_status() -> dict:
+    """Estado do pool para o /health: conexões em uso, máximo e quem está esperando."""
+    return {"iniciado": _pool is not None, "max": _pool_max, "em_uso": _em_uso, "esperando": _esperando}
+
+_SQL_TABELA = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([a-z_]+)", re.IGNORECASE)
+
+def nome_consulta(sql: str) -> str:
+    """Nome curto para as métricas: comando + primeira tabela (ex.: "select:produtos")."""
+    comando = sql.split(None, 1)[0].lower() if sql.strip() else "?"
+    tabela = _SQL_TABELA.search(sql)
+    return f"{comando}:{tabela.group(1).lower()}" if tabela else comando
+
+async def run(fn, *args, timeout: float = None, nome: str = None):
+    """Executa fn(cur, *args) numa transação dentro de uma thread e retorna o resultado.
+
+    Tudo que fn fizer com o cursor é commitado junto; qualquer exceção faz rollback.
+    `nome` identifica a consulta nas métricas (padrão: nome da função).
+    """
+    nome = nome or fn.__name__
+    inicio = time.perf_counter()
+    resultado = "erro"
+    try:
+        async with acquire(timeout) as conn:
+            def _work():
+                with conn:
+                    with conn.cursor() as cur:
+                        return fn(cur, *args)
+            trabalho = asyncio.ensure_future(asyncio.to_thread(_work))
+            try:
+                retorno = await asyncio.shield(trabalho)
+            except asyncio.CancelledError:
+                # A thread continua na transação com esta conexão: só sai do `acquire`
+                # (e devolve a conexão ao pool) depois que ela terminar
+                while not trabalho.done():
+                    try:
+                        await asyncio.wait([trabalho])
+                    except asyncio.CancelledError:
+                        pass
+                if not trabalho.cancelled():
+                    trabalho.exception()   # já tratada (commit ou rollback); evita o aviso do asyncio
+                raise
+        resultado = "ok"
+        return retorno
+    finally:
+        db_consultas.inc(nome, resultado)
+        db_duracao.observar(time.perf_counter() - inicio, nome)
+
+async def fetchone(sql: str, params=None, nome: str = None):
+    def _q(cur):
+        cur.execute(sql, params)
+        return cur.fetchone()
+    return await run(_q, nome=nome or nome_consulta(sql))
+
+async def fetchall(sql: str, params=None, nome: str = None):
+    def _q(cur):
+        cur.execute(sql, params)
+        return cur.fetchall()
+    return await run(_q, nome=nome or nome_consulta(sql))
+
+async def execute(sql: str, params=None, nome: str = None) -> int:
+    """Executa um comando e retorna o número de linhas afetadas."""
+    def _q(cur):
+        cur.execute(sql, params)
+        return cur.rowcount
+    return await run(_q, nome=nome or nome_consulta(sql))
+
+# ── Schema ────────────────────────────────────────────────────────────
+
+# CTE que soma as compras recém-inseridas (CTE `novos` com criado_em, produto e
+# valor_centavos) em vendas_diarias, no mesmo comando — e portanto na mesma transação.
+ACUMULAR_VENDAS = """, vendas AS (
+    INSERT INTO vendas_diarias (dia, produto, quantidade, total_centavos)
+    SELECT criado_em::date, produto, COUNT(*), SUM(valor_centavos) FROM novos GROUP BY 1, 2
+    ON CONFLICT (dia, produto) DO UPDATE
+    SET quantidade     = vendas_diarias.quantidade + EXCLUDED.quantidade,
+        total_centavos = vendas_diarias.total_centavos + EXCLUDED.total_centavos
+)"""
+
+# Adianta cada sequence de IDs até o maior ID já existente (nunca volta).
+# Roda no init_db e depois de importações em massa (importar.py).
+SINCRONIZAR_SEQUENCES = """
+SELECT setval('produtos_id_seq', m) FROM (
+    SELECT COALESCE(MAX(substring(id FROM '^prod_([0-9]+)$')::bigint), 0) AS m FROM produtos
+) s WHERE m > (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM produtos_id_seq);
+
+SELECT setval('free_itens_id_seq', m) FROM (
+    SELECT COALESCE(MAX(substring(id FROM '^free_([0-9]+)$')::bigint), 0) AS m FROM free_itens
+) s WHERE m > (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM free_itens_id_seq);
+
+SELECT setval('projetos_id_seq', m) FROM (
+    SELECT COALESCE(MAX(substring(id FROM '^proj_([0-9]+)$')::bigint), 0) AS m FROM projetos
+) s WHERE m > (SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM projetos_id_seq);
+"""
+
+SCHEMA = """
+-- ── LOJA ─────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS produtos (
+    id        TEXT PRIMARY KEY,
+    nome      TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    valor_centavos BIGINT NOT NULL CHECK (valor_centavos >= 0),
+    estoque   INTEGER NOT NULL DEFAULT 0,
+    imagem    TEXT,
+    msg_id    BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS carrinho (
+    user_id    TEXT NOT NULL,
+    produto_id TEXT NOT NULL,
+    nome       TEXT NOT NULL,
+    valor_centavos BIGINT NOT NULL CHECK (valor_centavos >= 0),
+    PRIMARY KEY (user_id, produto_id)
+);
+
+-- ── COMPRAS ───────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS compras (
+    id         TEXT PRIMARY KEY,
+    usuario_id BIGINT NOT NULL,
+    produto    TEXT NOT NULL,
+    valor_centavos BIGINT NOT NULL CHECK (valor_centavos >= 0),
+    observacao TEXT,
+    criado_em  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Migração: criado_em passa a ser obrigatório (a paginação do histórico compara
+-- (criado_em, id), e NULL quebraria o cursor). Compras antigas sem data ficam em
+-- 1970-01-01, no fim do histórico.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.columns
+               WHERE table_schema = current_schema() AND table_name = 'compras'
+                 AND column_name = 'criado_em' AND is_nullable = 'YES') THEN
+        UPDATE compras SET criado_em = 'epoch' WHERE criado_em IS NULL;
+        ALTER TABLE compras ALTER COLUMN criado_em SET NOT NULL;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS compras_contador (
+    id    INTEGER PRIMARY KEY CHECK (id = 1),
+    valor INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO compras_contador (id, valor)
+VALUES (1, 0)
+ON CONFLICT (id) DO NOTHING;
+
+-- Vendas agregadas por dia e produto, atualizadas na mesma transação de cada
+-- compra (ver ACUMULAR_VENDAS); o /relatorio-vendas só lê daqui.
+CREATE TABLE IF NOT EXISTS vendas_diarias (
+    dia            DATE NOT NULL,
+    produto        TEXT NOT NULL,
+    quantidade     INTEGER NOT NULL DEFAULT 0,
+    total_centavos BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, produto)
+);
+
+-- Histórico (/historico-compras): mais recentes primeiro, paginado por (criado_em, id)
+CREATE INDEX IF NOT EXISTS compras_usuario_criado_em ON compras (usuario_id, criado_em, id);
+CREATE INDEX IF NOT EXISTS compras_criado_em ON compras (criado_em, id);
+
+-- ── TICKETS ───────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id BIGINT PRIMARY KEY,
+    user_id    BIGINT NOT NULL,
+    status     TEXT NOT NULL DEFAULT 'aberto',
+    opened_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at  TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tickets_um_aberto_por_usuario
+    ON tickets (user_id) WHERE status = 'aberto';
+
+-- ── PROJETOS ──────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS projetos (
+    id        TEXT PRIMARY KEY,
+    nome      TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    url       TEXT,
+    imagem    TEXT,
+    cliente   TEXT,
+    msg_id    BIGINT
+);
+
+-- ── FREE ──────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS free_itens (
+    id        TEXT PRIMARY KEY,
+    nome      TEXT NOT NULL,
+    descricao TEXT NOT NULL,
+    link      TEXT NOT NULL,
+    estoque   INTEGER,
+    imagem    TEXT,
+    msg_id    BIGINT
+);
+
+-- Cliques no botão e downloads pelo link /d/<item>/<token>, gravados em lote (downloads.py)
+CREATE TABLE IF NOT EXISTS free_downloads (
+    id        BIGSERIAL PRIMARY KEY,
+    item_id   TEXT NOT NULL,
+    user_id   BIGINT NOT NULL,
+    tipo      TEXT NOT NULL,
+    criado_em TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS free_downloads_item_tipo ON free_downloads (item_id, tipo);
+
+-- ── ESTADO DO BOT (chave/valor: hash dos slash commands...) ──
+CREATE TABLE IF NOT EXISTS bot_estado (
+    chave         TEXT PRIMARY KEY,
+    valor         TEXT NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ── MENSAGENS FIXAS (regras, suporte, zoação) ─────────
+CREATE TABLE IF NOT EXISTS mensagens_fixas (
+    chave         TEXT PRIMARY KEY,
+    canal_id      BIGINT NOT NULL,
+    msg_id        BIGINT NOT NULL,
+    hash          TEXT NOT NULL,
+    atualizado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ── Valores em centavos ───────────────────────────────
+-- Texto livre antigo → centavos, com as mesmas regras de dinheiro.ler_valor:
+-- "37", "29.90", "29,90", "1.234", "R$ 1.234,56"; NULL se não der para ler
+CREATE OR REPLACE FUNCTION centavos_de_texto(t TEXT) RETURNS BIGINT AS $$
+    SELECT CASE WHEN c <= 100000000 THEN c END
+    FROM (
+        SELECT (round(CASE
+            WHEN s ~ '^[0-9]{1,3}([.][0-9]{3})+(,[0-9]{1,2})?$' THEN replace(replace(s, '.', ''), ',', '.')
+            WHEN s ~ '^[0-9]+([.,][0-9]{1,2})?$' THEN replace(s, ',', '.')
+        END::numeric * 100))::bigint AS c
+        FROM (SELECT replace(regexp_replace(btrim(coalesce(t, '')), '^R[$]', ''), ' ', '') AS s) a
+    ) b;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- 12345 → 'R$ 123,45' (mesmo formato de dinheiro.formatar_valor)
+CREATE OR REPLACE FUNCTION formatar_centavos(c BIGINT) RETURNS TEXT AS $$
+    SELECT 'R$ ' || translate(to_char(c / 100.0, 'FM999,999,999,990.00'), ',.', '.,');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Migração: coluna TEXT valor → BIGINT valor_centavos (só roda onde valor ainda existe).
+-- Se algum valor não puder ser lido, nada é migrado e o startup falha listando as linhas;
+-- o texto original fica guardado em valor_legado.
+DO $$
+DECLARE
+    t TEXT;
+    invalidos TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['produtos', 'carrinho', 'compras'] LOOP
+        IF EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_schema = current_schema() AND table_name = t AND column_name = 'valor') THEN
+            EXECUTE format(
+                'SELECT string_agg(format(''%%s = %%L'', %I, valor), ''; '') '
+                'FROM %I WHERE centavos_de_texto(valor) IS NULL',
+                CASE WHEN t = 'carrinho' THEN 'produto_id' ELSE 'id' END, t
+            ) INTO invalidos;
+            IF invalidos IS NOT NULL THEN
+                RAISE EXCEPTION 'Valores de % que não dá para converter em centavos (corrija e reinicie): %',
+                    t, invalidos;
+            END IF;
+            EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS valor_centavos BIGINT', t);
+            EXECUTE format('UPDATE %I SET valor_centavos = centavos_de_texto(valor)', t);
+            EXECUTE format('ALTER TABLE %I RENAME COLUMN valor TO valor_legado', t);
+            EXECUTE format('ALTER TABLE %I ALTER COLUMN valor_legado DROP NOT NULL', t);
+            EXECUTE format('ALTER TABLE %I ALTER COLUMN valor_centavos SET NOT NULL', t);
+            RAISE NOTICE 'Coluna valor de % migrada para valor_centavos (original em valor_legado)', t;
+        END IF;
+    END LOOP;
+END $$;
+
+-- Primeira carga das vendas agregadas a partir do histórico existente
+INSERT INTO vendas_diarias (dia, produto, quantidade, total_centavos)
+SELECT criado_em::date, produto, COUNT(*), SUM(valor_centavos)
+FROM compras
+WHERE NOT EXISTS (SELECT 1 FROM vendas_diarias)
+GROUP BY 1, 2;
+
+-- ── IDs sequenciais (prod_0001, free_0001, proj_0001) ──
+-- Uma sequence por tabela: IDs únicos mesmo com inserts simultâneos
+-- e nunca reaproveitados depois de uma remoção.
+CREATE SEQUENCE IF NOT EXISTS produtos_id_seq;
+CREATE SEQUENCE IF NOT EXISTS free_itens_id_seq;
+CREATE SEQUENCE IF NOT EXISTS projetos_id_seq;
+
+CREATE OR REPLACE FUNCTION proximo_id(prefixo TEXT, seq REGCLASS) RETURNS TEXT AS $$
+    SELECT prefixo || lpad(n::text, GREATEST(4, length(n::text)), '0')
+    FROM (SELECT nextval(seq) AS n) s;
+$$ LANGUAGE sql VOLATILE;
+
+-- Migração: adianta cada sequence até o maior ID já existente
+""" + SINCRONIZAR_SEQUENCES + """
+ALTER TABLE produtos   ALTER COLUMN id SET DEFAULT proximo_id('prod_', 'produtos_id_seq');
+ALTER TABLE free_itens ALTER COLUMN id SET DEFAULT proximo_id('free_', 'free_itens_id_seq');
+ALTER TABLE projetos   ALTER COLUMN id SET DEFAULT proximo_id('proj_', 'projetos_id_seq');
+
+-- ── NOTIFY do catálogo (invalida o cache em catalogo.py) ──
+CREATE OR REPLACE FUNCTION notificar_catalogo() RETURNS trigger AS $$
+DECLARE
+    rid TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rid := OLD.id;
+    ELSE
+        rid := NEW.id;
+    END IF;
+    PERFORM pg_notify('catalogo_alterado',
+        json_build_object('tabela', TG_TABLE_NAME, 'id', rid, 'op', TG_OP)::text);
+    IF TG_OP = 'UPDATE' AND OLD.id IS DISTINCT FROM NEW.id THEN
+        PERFORM pg_notify('catalogo_alterado',
+            json_build_object('tabela', TG_TABLE_NAME, 'id', OLD.id, 'op', TG_OP)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS produtos_notify ON produtos;
+CREATE TRIGGER produtos_notify AFTER INSERT OR UPDATE OR DELETE ON produtos
+    FOR EACH ROW EXECUTE FUNCTION notificar_catalogo();
+
+DROP TRIGGER IF EXISTS free_itens_notify ON free_itens;
+CREATE TRIGGER free_itens_notify AFTER INSERT OR UPDATE OR DELETE ON free_itens
+    FOR EACH ROW EXECUTE FUNCTION notificar_catalogo();
+"""
+
+async def init_db():
+    """Cria todas as tabelas se não existirem."""
+    await run(lambda cur: cur.execute(SCHEMA), nome="init_db")
+    logger.info("✅ Banco de dados PostgreSQL iniciado.")
@@ -0,0 +1,34 @@
+# ============================================================
+#   dinheiro.py — Valores em centavos (inteiros)
+#   O banco guarda todo valor como BIGINT em centavos; texto só
+#   na entrada (comandos) e na saída (embeds).
+# ============================================================
+import re
+from decimal import Decimal
+
+VALOR_MAXIMO = 100_000_000   # centavos (R$ 1.000.000,00)
+
+# "37", "29.90", "29,90", "1.234,56", "R$ 1234.5"
+_FORMATO_BR = re.compile(r"^\d{1,3}(\.\d{3})+(,\d{1,2})?$")
+_FORMATO_SIMPLES = re.compile(r"^\d+([.,]\d{1,2})?$")
+
+
+def ler_valor(texto: str) -> int:
+    """Converte o valor digitado num comando para centavos. ValueError se for inválido."""
+    limpo = (texto or "").strip().removeprefix("R$").replace(" ", "")
+    if _FORMATO_BR.match(limpo):
+        limpo = limpo.replace(".", "").replace(",", ".")
+    elif _FORMATO_SIMPLES.match(limpo):
+        limpo = limpo.replace(",", ".")
+    else:
+        raise ValueError(f"❌ Valor inválido: `{texto}`. Use por exemplo `29.90` ou `29,90`.")
+    centavos = int(Decimal(limpo) * 100)
+    if centavos > VALOR_MAXIMO:
+        raise ValueError(f"❌ Valor muito alto: `{texto}` (máximo {formatar_valor(VALOR_MAXIMO)}).")
+    return centavos
+
+
+def formatar_valor(centavos: int) -> str:
+    """12345 → "R$ 123,45" (mesmo formato da função SQL formatar_centavos)."""
+    reais, resto = divmod(int(centavos), 100)
+    return f"R$ {reais:,}".replace(",", ".") + f",{resto:02d}"
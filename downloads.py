@@ -0,0 +1,170 @@
+# ============================================================
+#   downloads.py — Links de download dos itens free + estatísticas
+#   O botão Free entrega /d/<item_id>/<token> (servidor web embutido),
+#   que redireciona para o link real. Cliques e downloads vão para um
+#   buffer em memória e são gravados em lote em free_downloads; a baixa
+#   no estoque sai no mesmo comando, somada por item.
+# ============================================================
+import asyncio
+import datetime
+import hashlib
+import hmac
+import logging
+import os
+import time
+from collections import deque
+from aiohttp import web
+from config import *
+from catalogo import catalogo
+from database import run
+
+logger = logging.getLogger(__name__)
+
+DOWNLOADS_INTERVALO  = 10      # segundos entre gravações do buffer
+DOWNLOADS_LOTE       = 500     # eventos que disparam uma gravação antecipada
+DOWNLOADS_BUFFER_MAX = 20000   # acima disso os eventos mais antigos são descartados
+
+EVENTO_CLIQUE   = "clique"
+EVENTO_DOWNLOAD = "download"
+
+# Chave dos tokens: DOWNLOAD_SEGREDO, ou derivada do token do bot
+_SEGREDO = (os.environ.get("DOWNLOAD_SEGREDO") or hashlib.sha256(f"downloads:{BOT_TOKEN}".encode()).hexdigest()).encode()
+
+GRAVAR_SQL = """
+WITH eventos AS (
+    SELECT * FROM unnest(%s::text[], %s::bigint[], %s::text[], %s::timestamptz[])
+        AS e(item_id, user_id, tipo, criado_em)
+), gravados AS (
+    INSERT INTO free_downloads (item_id, user_id, tipo, criado_em)
+    SELECT item_id, user_id, tipo, criado_em FROM eventos
+)
+UPDATE free_itens f SET estoque = GREATEST(f.estoque - d.qtd, 0)
+FROM (SELECT item_id, COUNT(*) AS qtd FROM eventos WHERE tipo = 'download' GROUP BY item_id) d
+WHERE f.id = d.item_id AND f.estoque IS NOT NULL
+"""
+
+
+def _assinatura(item_id: str, user_id: int, expira: int) -> str:
+    msg = f"{item_id}:{user_id}:{expira}".encode()
+    return hmac.new(_SEGREDO, msg, hashlib.sha256).hexdigest()[:24]
+
+
+def gerar_token(item_id: str, user_id: int, validade: int = DOWNLOAD_VALIDADE) -> str:
+    expira = int(time.time()) + validade
+    return f"{user_id}.{expira}.{_assinatura(item_id, user_id, expira)}"
+
+
+def ler_token(item_id: str, token: str):
+    """user_id do token se a assinatura confere e ainda não expirou; senão None."""
+    try:
+        user_id, expira, assinatura = token.split(".")
+        user_id, expira = int(user_id), int(expira)
+    except ValueError:
+        return None
+    if expira < time.time() or not hmac.compare_digest(assinatura, _assinatura(item_id, user_id, expira)):
+        return None
+    return user_id
+
+
+def url_download(item_id: str, user_id: int) -> str:
+    return f"{URL_PUBLICA}/d/{item_id}/{gerar_token(item_id, user_id)}"
+
+
+class RegistroDownloads:
+    def __init__(self):
+        self._buffer = deque(maxlen=DOWNLOADS_BUFFER_MAX)
+        self._acordar = asyncio.Event()
+        self._task = None
+        self.gravados = 0
+        self.gravacoes = 0
+        self.descartados = 0
+        self.falhas = 0
+
+    # ── Eventos ──────────────────────────────────────────────────────
+
+    def registrar(self, item_id: str, user_id: int, tipo: str):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.descartados += 1
+        self._buffer.append((item_id, user_id, tipo, datetime.datetime.now(datetime.timezone.utc)))
+        if len(self._buffer) >= DOWNLOADS_LOTE:
+            self._acordar.set()
+
+    def pendentes(self, item_id: str = None) -> dict:
+        """Eventos ainda no buffer, por tipo (somados ao /free-stats)."""
+        contagem = {EVENTO_CLIQUE: 0, EVENTO_DOWNLOAD: 0}
+        for evento in self._buffer:
+            if item_id is None or evento[0] == item_id:
+                contagem[evento[2]] += 1
+        return contagem
+
+    def stats(self) -> dict:
+        return {"pendentes": len(self._buffer), "gravados": self.gravados, "gravacoes": self.gravacoes,
+                "descartados": self.descartados, "falhas": self.falhas}
+
+    # ── Ciclo de vida ────────────────────────────────────────────────
+
+    def iniciar(self):
+        if self._task is None:
+            self._acordar = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def parar(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.gravar()
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._acordar.wait(), timeout=DOWNLOADS_INTERVALO)
+            except asyncio.TimeoutError:
+                pass
+            self._acordar.clear()
+            await self.gravar()
+
+    async def gravar(self):
+        """Grava o buffer inteiro num único comando; em caso de erro os eventos voltam para o buffer."""
+        if not self._buffer:
+            return
+        lote = list(self._buffer)
+        self._buffer.clear()
+        try:
+            await run(lambda cur: cur.execute(GRAVAR_SQL, tuple(map(list, zip(*lote)))), nome="free_downloads")
+        except Exception as e:
+            self.falhas += 1
+            logger.error(f"Erro ao gravar {len(lote)} evento(s) de download: {e}")
+            # Devolve só o que cabe (os eventos que chegaram durante a gravação ficam);
+            # como no append, os mais antigos são os descartados
+            livre = self._buffer.maxlen - len(self._buffer)
+            devolver = lote[len(lote) - livre:] if livre > 0 else []
+            perdidos = len(lote) - len(devolver)
+            self._buffer.extendleft(reversed(devolver))
+            if perdidos:
+                self.descartados += perdidos
+                logger.warning(f"⚠️ Buffer de downloads cheio: {perdidos} evento(s) antigo(s) descartado(s).")
+            return
+        self.gravados += len(lote)
+        self.gravacoes += 1
+
+    # ── Rota do servidor web ─────────────────────────────────────────
+
+    async def rota(self, request: web.Request):
+        item_id = request.match_info["item_id"]
+        user_id = ler_token(item_id, request.match_info["token"])
+        if user_id is None:
+            return web.Response(status=403, text="Link de download inválido ou expirado. Clique no botão de novo.")
+        item = await catalogo.get_free(item_id)
+        if not item:
+            return web.Response(status=404, text="Item não encontrado.")
+        if item["estoque"] is not None and item["estoque"] <= 0:
+            return web.Response(status=410, text="Item esgotado no momento.")
+        self.registrar(item_id, user_id, EVENTO_DOWNLOAD)
+        raise web.HTTPFound(item["link"])
+
+
+downloads = RegistroDownloads()
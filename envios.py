@@ -0,0 +1,227 @@
+# ============================================================
+#   envios.py — Agendador central de chamadas à API do Discord
+#   Filas por canal com prioridade, orçamento por canal e global,
+#   e retry com backoff quando o Discord responde 429/5xx.
+# ============================================================
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Prioridades (menor sai primeiro)
+PRIORIDADE_USUARIO    = 0   # respostas que um membro está esperando ver
+PRIORIDADE_NORMAL     = 1   # ações de ADM (posts da loja, remoções...)
+PRIORIDADE_MANUTENCAO = 2   # logs, limpeza de canal, refresh de embeds fixos
+
+GLOBAL_POR_SEGUNDO = 45     # Discord permite 50/s por bot; deixa folga
+CANAL_CAPACIDADE   = 5      # ~5 requisições a cada 5 s por canal
+CANAL_POR_SEGUNDO  = 1.0
+MAX_TENTATIVAS     = 4
+ESPERA_ALERTA      = 2.0    # segundos na fila a partir dos quais avisamos no log
+
+
+class _Balde:
+    """Token bucket simples."""
+    __slots__ = ("capacidade", "taxa", "tokens", "t")
+
+    def __init__(self, capacidade: float, taxa: float):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.tokens = capacidade
+        self.t = time.monotonic()
+
+    def espera(self, agora: float) -> float:
+        self.tokens = min(self.capacidade, self.tokens + (agora - self.t) * self.taxa)
+        self.t = agora
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.taxa
+
+    def consumir(self):
+        self.tokens -= 1
+
+    def bloquear(self, segundos: float):
+        self.tokens = min(self.tokens, 1 - segundos * self.taxa)
+
+
+class _Tarefa:
+    __slots__ = ("fabrica", "chave", "prioridade", "futuro", "criado", "tentativas", "descricao")
+
+    def __init__(self, fabrica, chave, prioridade, futuro, descricao):
+        self.fabrica = fabrica
+        self.chave = chave
+        self.prioridade = prioridade
+        self.futuro = futuro
+        self.criado = time.monotonic()
+        self.tentativas = 0
+        self.descricao = descricao
+
+
+class Agendador:
+    def __init__(self):
+        self._filas = {}        # chave (id do canal) -> heap de (prioridade, seq, tarefa)
+        self._baldes = {}
+        self._global = _Balde(GLOBAL_POR_SEGUNDO, GLOBAL_POR_SEGUNDO)
+        self._seq = itertools.count()
+        self._acordar = asyncio.Event()
+        self._task = None
+        self.enviados = 0
+        self.falhas = 0
+        self.retries = 0
+        self.rate_limits = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.em_execucao = 0
+
+    # ── API ──────────────────────────────────────────────────────────
+
+    def agendar(self, chave: int, fabrica, prioridade: int = PRIORIDADE_NORMAL, descricao: str = "") -> asyncio.Future:
+        """Enfileira `fabrica()` (função que devolve a coroutine da chamada) e retorna um Future.
+
+        `chave` é o ID do canal (ou da guild, para criação de canais) cujo limite a chamada consome.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        self._enfileirar(_Tarefa(fabrica, chave, prioridade, futuro, descricao))
+        return futuro
+
+    async def enviar(self, chave: int, fabrica, prioridade: int = PRIORIDADE_NORMAL, descricao: str = ""):
+        """Igual a agendar(), mas espera a chamada terminar e devolve o resultado."""
+        return await self.agendar(chave, fabrica, prioridade, descricao)
+
+    def disparar(self, chave: int, fabrica, prioridade: int = PRIORIDADE_MANUTENCAO, descricao: str = ""):
+        """Enfileira sem esperar; erros só vão para o log."""
+        futuro = self.agendar(chave, fabrica, prioridade, descricao)
+        futuro.add_done_callback(self._logar_falha)
+
+    def stats(self) -> dict:
+        por_prioridade = {PRIORIDADE_USUARIO: 0, PRIORIDADE_NORMAL: 0, PRIORIDADE_MANUTENCAO: 0}
+        for fila in self._filas.values():
+            for prioridade, _, _ in fila:
+                por_prioridade[prioridade] = por_prioridade.get(prioridade, 0) + 1
+        return {
+            "pendentes": sum(por_prioridade.values()),
+            "pendentes_usuario": por_prioridade[PRIORIDADE_USUARIO],
+            "pendentes_normal": por_prioridade[PRIORIDADE_NORMAL],
+            "pendentes_manutencao": por_prioridade[PRIORIDADE_MANUTENCAO],
+            "canais_com_fila": len(self._filas),
+            "em_execucao": self.em_execucao,
+            "enviados": self.enviados,
+            "falhas": self.falhas,
+            "retries": self.retries,
+            "rate_limits": self.rate_limits,
+            "espera_media": self.espera_total / self.enviados if self.enviados else 0.0,
+            "espera_max": self.espera_max,
+        }
+
+    # ── Ciclo de vida ────────────────────────────────────────────────
+
+    def iniciar(self):
+        if self._task is None:
+            self._acordar = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._despachar())
+
+    async def parar(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # ── Interno ──────────────────────────────────────────────────────
+
+    def _enfileirar(self, tarefa: _Tarefa):
+        fila = self._filas.setdefault(tarefa.chave, [])
+        heapq.heappush(fila, (tarefa.prioridade, next(self._seq), tarefa))
+        if tarefa.chave not in self._baldes:
+            self._baldes[tarefa.chave] = _Balde(CANAL_CAPACIDADE, CANAL_POR_SEGUNDO)
+        self._acordar.set()
+
+    async def _despachar(self):
+        while True:
+            self._acordar.clear()
+            agora = time.monotonic()
+            escolhido, proxima = None, None
+            for chave, fila in self._filas.items():
+                espera = self._baldes[chave].espera(agora)
+                if espera > 0:
+                    proxima = espera if proxima is None else min(proxima, espera)
+                elif escolhido is None or fila[0][:2] < self._filas[escolhido][0][:2]:
+                    escolhido = chave
+
+            if escolhido is None:
+                try:
+                    await asyncio.wait_for(self._acordar.wait(), timeout=proxima)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            espera_global = self._global.espera(agora)
+            if espera_global > 0:
+                await asyncio.sleep(espera_global)
+                continue
+
+            fila = self._filas[escolhido]
+            _, _, tarefa = heapq.heappop(fila)
+            if not fila:
+                del self._filas[escolhido]
+            self._baldes[escolhido].consumir()
+            self._global.consumir()
+            asyncio.get_running_loop().create_task(self._executar(tarefa))
+
+    async def _executar(self, tarefa: _Tarefa):
+        if tarefa.futuro.done():  # cancelado por quem pediu
+            return
+        espera = time.monotonic() - tarefa.criado
+        self.em_execucao += 1
+        try:
+            resultado = await tarefa.fabrica()
+        except discord.HTTPException as e:
+            if (e.status == 429 or e.status >= 500) and tarefa.tentativas < MAX_TENTATIVAS:
+                self._tentar_de_novo(tarefa, e)
+                return
+            self.falhas += 1
+            if not tarefa.futuro.done():
+                tarefa.futuro.set_exception(e)
+        except Exception as e:
+            self.falhas += 1
+            if not tarefa.futuro.done():
+                tarefa.futuro.set_exception(e)
+        else:
+            if not tarefa.futuro.done():
+                tarefa.futuro.set_result(resultado)
+        finally:
+            self.em_execucao -= 1
+        self.enviados += 1
+        self.espera_total += espera
+        self.espera_max = max(self.espera_max, espera)
+        if espera > ESPERA_ALERTA:
+            logger.warning(
+                f"⏳ Fila do Discord saturada: '{tarefa.descricao or 'chamada'}' esperou {espera:.1f}s "
+                f"({self.stats()['pendentes']} pendente(s))."
+            )
+
+    def _tentar_de_novo(self, tarefa: _Tarefa, erro: discord.HTTPException):
+        tarefa.tentativas += 1
+        self.retries += 1
+        atraso = getattr(erro, "retry_after", None) or min(2 ** tarefa.tentativas, 30)
+        if erro.status == 429:
+            self.rate_limits += 1
+            self._baldes.setdefault(tarefa.chave, _Balde(CANAL_CAPACIDADE, CANAL_POR_SEGUNDO)).bloquear(atraso)
+        logger.warning(
+            f"🔁 {tarefa.descricao or 'Chamada'} falhou com HTTP {erro.status}; "
+            f"tentativa {tarefa.tentativas}/{MAX_TENTATIVAS} em {atraso:.1f}s."
+        )
+        asyncio.get_running_loop().call_later(atraso, self._enfileirar, tarefa)
+
+    @staticmethod
+    def _logar_falha(futuro: asyncio.Future):
+        if not futuro.cancelled() and futuro.exception():
+            logger.error(f"Erro em chamada agendada ao Discord: {futuro.exception()}")
+
+
+agendador = Agendador()
@@ -0,0 +1,124 @@
+# ============================================================
+#   fixas.py — Mensagens fixas (regras, suporte, zoação)
+#   Guarda o ID e um hash do conteúdo de cada mensagem fixa:
+#   hash igual → nada a fazer; hash diferente → um único edit;
+#   mensagem sumiu → limpa o canal e reposta.
+# ============================================================
+import datetime
+import hashlib
+import json
+import logging
+import os
+import discord
+from database import fetchone, execute
+from envios import agendador, PRIORIDADE_MANUTENCAO
+
+logger = logging.getLogger(__name__)
+
+FIXA_INALTERADA = "inalterada"
+FIXA_EDITADA    = "editada"
+FIXA_ENVIADA    = "enviada"
+
+LIMPEZA_HISTORICO     = int(os.environ.get("LIMPEZA_HISTORICO", "50"))
+# O Discord recusa bulk delete de mensagens com 14 dias ou mais (margem de 1 h)
+BULK_DELETE_IDADE_MAX = datetime.timedelta(days=14) - datetime.timedelta(hours=1)
+
+
+def hash_conteudo(content: str = None, embed: discord.Embed = None, view: discord.ui.View = None) -> str:
+    """Hash estável do que a mensagem mostra (ignora o timestamp do embed)."""
+    embed_dict = embed.to_dict() if embed else None
+    if embed_dict:
+        embed_dict.pop("timestamp", None)
+    payload = {
+        "content": content,
+        "embed": embed_dict,
+        "components": view.to_components() if view else None,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def publicar_fixa(bot, chave: str, canal: discord.TextChannel, content: str = None,
+                        embed: discord.Embed = None, view: discord.ui.View = None,
+                        forcar: bool = False, historico: int = LIMPEZA_HISTORICO, hash_: str = None) -> str:
+    """Garante que a mensagem fixa `chave` está no canal com o conteúdo atual.
+
+    Com `forcar`, mesmo com hash igual a mensagem é editada, o que também
+    confirma que ela ainda existe (usado pelos comandos /setup-*).
+    `hash_` permite passar o hash já calculado (ver modelos.py).
+    """
+    novo_hash = hash_ or hash_conteudo(content, embed, view)
+    row = await fetchone("SELECT * FROM mensagens_fixas WHERE chave = %s", (chave,))
+
+    if row and row["canal_id"] == canal.id:
+        if row["hash"] == novo_hash and not forcar:
+            return FIXA_INALTERADA
+        msg = canal.get_partial_message(row["msg_id"])
+        try:
+            await agendador.enviar(
+                canal.id, lambda: msg.edit(content=content, embed=embed, view=view),
+                PRIORIDADE_MANUTENCAO, f"editar {chave}"
+            )
+            await _salvar(chave, canal.id, row["msg_id"], novo_hash)
+            return FIXA_EDITADA
+        except discord.NotFound:
+            logger.info(f"ℹ️ Mensagem fixa '{chave}' não existe mais, reenviando.")
+
+    await _limpar_canal(bot, canal, historico, chave)
+    msg = await agendador.enviar(
+        canal.id, lambda: canal.send(content=content, embed=embed, view=view),
+        PRIORIDADE_MANUTENCAO, f"enviar {chave}"
+    )
+    await _salvar(chave, canal.id, msg.id, novo_hash)
+    return FIXA_ENVIADA
+
+
+async def _salvar(chave: str, canal_id: int, msg_id: int, hash_: str):
+    await execute(
+        "INSERT INTO mensagens_fixas (chave, canal_id, msg_id, hash) VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (chave) DO UPDATE SET canal_id = EXCLUDED.canal_id, msg_id = EXCLUDED.msg_id, "
+        "hash = EXCLUDED.hash, atualizado_em = CURRENT_TIMESTAMP",
+        (chave, canal_id, msg_id, hash_)
+    )
+
+
+async def limpar_canal(bot, canal: discord.TextChannel, historico: int = LIMPEZA_HISTORICO) -> dict:
+    """Apaga as mensagens do bot nas últimas `historico` mensagens do canal.
+
+    Mensagens com menos de 14 dias saem pelo bulk delete (até 100 por
+    chamada); só as mais antigas são apagadas uma a uma, pela fila do
+    agendador. Retorna quantas foram apagadas e quantas chamadas à API
+    foram usadas.
+    """
+    limite = discord.utils.utcnow() - BULK_DELETE_IDADE_MAX
+    recentes, antigas, chamadas = [], [], max(1, -(-historico // 100))  # páginas do history
+    async for msg in canal.history(limit=historico):
+        if msg.author != bot.user:
+            continue
+        (recentes if msg.created_at > limite else antigas).append(msg)
+
+    for i in range(0, len(recentes), 100):
+        lote = recentes[i:i + 100]
+        await agendador.enviar(
+            canal.id, lambda l=lote: canal.delete_messages(l),
+            PRIORIDADE_MANUTENCAO, f"limpar #{canal.name}"
+        )
+        chamadas += 1
+    for msg in antigas:
+        agendador.disparar(canal.id, msg.delete, PRIORIDADE_MANUTENCAO, f"limpar #{canal.name}")
+        chamadas += 1
+
+    resultado = {"apagadas": len(recentes) + len(antigas), "bulk": len(recentes), "avulsas": len(antigas),
+                 "chamadas": chamadas}
+    logger.info(
+        f"🧹 #{canal.name}: {resultado['apagadas']} mensagem(ns) do bot apagada(s) "
+        f"({resultado['bulk']} em bulk, {resultado['avulsas']} avulsas) com {chamadas} chamada(s) à API."
+    )
+    return resultado
+
+
+async def _limpar_canal(bot, canal: discord.TextChannel, historico: int, chave: str):
+    """Apaga mensagens antigas do bot antes de repostar a fixa."""
+    try:
+        await limpar_canal(bot, canal, historico)
+    except Exception as e:
+        logger.error(f"Erro ao limpar canal de {chave}: {e}")
@@ -0,0 +1,223 @@
+# ============================================================
+#   importar.py — Importa os dados do antigo backend JSON
+#   (data/loja.json, data/free.json, data/compras.json) para o
+#   PostgreSQL via COPY. Idempotente: linhas já existentes (mesmo
+#   ID / mesmo produto no carrinho) são ignoradas, então pode rodar
+#   de novo sem duplicar nada. Os msg_id são mantidos, para os
+#   botões das mensagens já postadas continuarem funcionando.
+#
+#   Uso:  python importar.py [--dir data]
+#   Variável de ambiente: DATABASE_URL
+# ============================================================
+import argparse
+import json
+import logging
+import os
+import time
+from database import get_conn, SCHEMA, SINCRONIZAR_SEQUENCES, ACUMULAR_VENDAS
+from dinheiro import ler_valor
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COPY_BLOCO = 64 * 1024   # bytes de CSV entregues por vez ao COPY
+
+# Itens no carrinho são unidades reservadas (ver reservar_produto em cogs/loja.py):
+# cada item importado baixa uma unidade do estoque, como faria o botão.
+RESERVAR_CARRINHO = """, baixa AS (
+    UPDATE produtos p SET estoque = GREATEST(p.estoque - n.qtd, 0)
+    FROM (SELECT produto_id, COUNT(*) AS qtd FROM novos GROUP BY produto_id) n
+    WHERE p.id = n.produto_id
+)"""
+
+
+def _campo(valor) -> str:
+    """Campo CSV do COPY: None vira NULL (campo vazio sem aspas), o resto vai entre aspas."""
+    if valor is None:
+        return ""
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+class _FluxoCsv:
+    """Arquivo só-leitura que gera o CSV sob demanda a partir de um iterador de tuplas.
+
+    O COPY lê em blocos, então nunca existe o CSV inteiro em memória.
+    """
+
+    def __init__(self, linhas):
+        self._linhas = iter(linhas)
+        self._buffer = ""
+        self.total = 0
+
+    def read(self, tamanho: int = -1) -> str:
+        tamanho = COPY_BLOCO if tamanho is None or tamanho < 0 else tamanho
+        partes, acumulado = [self._buffer], len(self._buffer)
+        while acumulado < tamanho:
+            linha = next(self._linhas, None)
+            if linha is None:
+                break
+            texto = ",".join(_campo(v) for v in linha) + "\n"
+            partes.append(texto)
+            acumulado += len(texto)
+            self.total += 1
+        dados = "".join(partes)
+        self._buffer = dados[tamanho:]
+        return dados[:tamanho]
+
+
+def _ler_json(pasta: str, nome: str) -> dict:
+    caminho = os.path.join(pasta, nome)
+    if not os.path.exists(caminho):
+        logger.warning(f"⚠️ {caminho} não encontrado, pulando.")
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ── Linhas de cada tabela ────────────────────────────────────────────
+
+def _centavos(valor):
+    """Valor antigo (texto livre ou número) em centavos; None se não der para ler."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        valor = f"{valor:.2f}"
+    try:
+        return ler_valor(str(valor))
+    except ValueError:
+        return None
+
+
+def _linhas_produtos(loja: dict, ignorados: list):
+    for pid, p in loja.get("produtos", {}).items():
+        centavos = _centavos(p.get("valor"))
+        if centavos is None:
+            ignorados.append(("produtos", pid, p.get("valor")))
+            continue
+        yield (pid, p["nome"], p["descricao"], centavos, p.get("estoque") or 0, p.get("imagem"), p.get("msg_id"))
+
+
+def _linhas_free(free: dict):
+    for fid, item in free.get("itens", {}).items():
+        yield (fid, item["nome"], item["descricao"], item["link"], item.get("estoque"), item.get("imagem"),
+               item.get("msg_id"))
+
+
+def _linhas_carrinho(loja: dict, ignorados: list):
+    """Itens do carrinho antigo: IDs soltos ou dicts com id/nome/valor; nome e valor vêm do produto se faltarem."""
+    produtos = loja.get("produtos", {})
+    for user_id, itens in loja.get("carrinho", {}).items():
+        for item in itens:
+            if isinstance(item, dict):
+                pid = item.get("produto_id") or item.get("id")
+                nome, valor = item.get("nome"), item.get("valor")
+            else:
+                pid, nome, valor = str(item), None, None
+            produto = produtos.get(pid, {})
+            nome, centavos = nome or produto.get("nome"), _centavos(valor or produto.get("valor"))
+            if not pid or not nome or centavos is None:
+                ignorados.append(("carrinho", user_id, item))
+                continue
+            yield (str(user_id), pid, nome, centavos)
+
+
+def _linhas_compras(compras: dict, ignorados: list):
+    for c in compras.get("compras", []):
+        centavos = _centavos(c.get("valor"))
+        if centavos is None:
+            ignorados.append(("compras", c["id"], c.get("valor")))
+            continue
+        yield (c["id"], c["usuario_id"], c["produto"], centavos, c.get("observacao"), c.get("criado_em"))
+
+
+# ── COPY → tabela temporária → INSERT ... ON CONFLICT DO NOTHING ─────
+
+def _importar_tabela(cur, tabela: str, colunas: tuple, chave: tuple, linhas, selecao: str = None,
+                     depois: str = "") -> dict:
+    """Importa `linhas` em `tabela`; `depois` é um CTE extra que enxerga as linhas novas em `novos`."""
+    inicio = time.perf_counter()
+    temp = f"importar_{tabela}"
+    cols = ", ".join(colunas)
+    cur.execute(f"CREATE TEMP TABLE {temp} (LIKE {tabela}) ON COMMIT DROP")
+    # NULL pode chegar à tabela temporária: `selecao` preenche o padrão (ex.: criado_em)
+    # e o INSERT final ainda valida as restrições da tabela de verdade
+    cur.execute(f"ALTER TABLE {temp} " + ", ".join(f"ALTER COLUMN {c} DROP NOT NULL" for c in colunas))
+    fluxo = _FluxoCsv(linhas)
+    cur.copy_expert(f"COPY {temp} ({cols}) FROM STDIN WITH (FORMAT csv)", fluxo, size=COPY_BLOCO)
+    cur.execute(
+        f"WITH novos AS ("
+        f"    INSERT INTO {tabela} ({cols}) "
+        f"    SELECT DISTINCT ON ({', '.join(chave)}) {selecao or cols} FROM {temp} "
+        f"    ON CONFLICT DO NOTHING RETURNING {cols}"
+        f"){depois} SELECT COUNT(*) AS n FROM novos"
+    )
+    inseridas = cur.fetchone()["n"]
+    duracao = time.perf_counter() - inicio
+    resultado = {"tabela": tabela, "lidas": fluxo.total, "inseridas": inseridas, "duracao": duracao}
+    logger.info(
+        f"📥 {tabela}: {fluxo.total} lida(s), {inseridas} inserida(s), "
+        f"{fluxo.total - inseridas} já existia(m) — {duracao:.2f}s ({_por_segundo(fluxo.total, duracao)} linhas/s)"
+    )
+    return resultado
+
+
+def _por_segundo(linhas: int, duracao: float) -> str:
+    return f"{linhas / duracao:,.0f}" if duracao > 0 else "∞"
+
+
+def importar(pasta: str = "data") -> list:
+    loja = _ler_json(pasta, "loja.json")
+    free = _ler_json(pasta, "free.json")
+    compras = _ler_json(pasta, "compras.json")
+    ignorados = []
+
+    conn = get_conn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(SCHEMA)
+        inicio = time.perf_counter()
+        # Tudo numa transação: ou entra a importação inteira, ou nada
+        with conn:
+            with conn.cursor() as cur:
+                resultados = [
+                    _importar_tabela(cur, "produtos",
+                                     ("id", "nome", "descricao", "valor_centavos", "estoque", "imagem", "msg_id"),
+                                     ("id",), _linhas_produtos(loja, ignorados)),
+                    _importar_tabela(cur, "free_itens",
+                                     ("id", "nome", "descricao", "link", "estoque", "imagem", "msg_id"),
+                                     ("id",), _linhas_free(free)),
+                    _importar_tabela(cur, "carrinho", ("user_id", "produto_id", "nome", "valor_centavos"),
+                                     ("user_id", "produto_id"), _linhas_carrinho(loja, ignorados),
+                                     depois=RESERVAR_CARRINHO),
+                    _importar_tabela(cur, "compras",
+                                     ("id", "usuario_id", "produto", "valor_centavos", "observacao", "criado_em"),
+                                     ("id",), _linhas_compras(compras, ignorados),
+                                     "id, usuario_id, produto, valor_centavos, observacao, "
+                                     "COALESCE(criado_em, CURRENT_TIMESTAMP)",
+                                     depois=ACUMULAR_VENDAS),
+                ]
+                # O contador de pedidos nunca volta: fica com o maior entre o atual e o do JSON
+                cur.execute(
+                    "UPDATE compras_contador SET valor = GREATEST(valor, %s) WHERE id = 1",
+                    (int(compras.get("contador", 0)),)
+                )
+                cur.execute(SINCRONIZAR_SEQUENCES)
+    finally:
+        conn.close()
+
+    for tabela, chave, item in ignorados:
+        logger.warning(f"⚠️ {tabela}: linha ignorada (produto ou valor inválido): {chave} → {item!r}")
+    duracao = time.perf_counter() - inicio
+    lidas = sum(r["lidas"] for r in resultados)
+    inseridas = sum(r["inseridas"] for r in resultados)
+    logger.info(
+        f"✅ Importação concluída: {lidas} linha(s) lida(s), {inseridas} inserida(s) em {duracao:.2f}s "
+        f"({_por_segundo(lidas, duracao)} linhas/s)."
+    )
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa data/*.json (backend antigo) para o PostgreSQL.")
+    parser.add_argument("--dir", default="data", help="Pasta com loja.json, free.json e compras.json")
+    args = parser.parse_args()
+    importar(args.dir)
@@ -1,52 +1,48 @@
+from perfil import perfil  # primeiro import: mede o tempo dos demais
 import discord
 from discord.ext import commands
 import asyncio
+import hashlib
+import json
 import logging
 import os
-import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+import aiohttp
 from config import *
-from database import init_db
+from database import init_pool, close_pool, init_db, fetchone, execute
+from catalogo import catalogo
+from downloads import downloads
+from vitrine import vitrine
+from envios import agendador
+from servidor_web import ServidorWeb, linhas_de_stats
+from metricas import metricas, marcar_recebida, instrumentar_interacoes, trace_discord
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+perfil.marcar("imports")
 
-# ── Servidor web embutido (Render precisa de porta aberta) ────────────
-
-class PingHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.end_headers()
-        self.wfile.write(b"NatanSites Bot - Online!")
-    def do_HEAD(self):
-        self.send_response(200)
-        self.end_headers()
-    def log_message(self, format, *args):
-        pass
-
-def iniciar_servidor_web():
-    servidor = HTTPServer(("0.0.0.0", 8080), PingHandler)
-    logger.info("🌐 Servidor web interno iniciado na porta 8080")
-    servidor.serve_forever()
+# ── Autoping (mantém o Render acordado) ───────────────────────────────
 
-async def autoping():
+async def autoping(porta: int):
     """Ping a cada 5 minutos via variável BOT_PING para manter o Render acordado."""
-    import aiohttp
     # Usa a variável de ambiente BOT_PING se definida, senão pinga localhost
-    ping_url = os.environ.get("BOT_PING", "http://localhost:8080")
+    ping_url = os.environ.get("BOT_PING", f"http://localhost:{porta}")
     logger.info(f"🏓 Autoping configurado para: {ping_url}")
     await asyncio.sleep(60)  # Aguarda 1 min antes do primeiro ping
-    while True:
-        try:
-            async with aiohttp.ClientSession() as session:
+    # Uma única sessão (e pool de conexões) para todos os pings
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+        while True:
+            try:
                 async with session.get(ping_url) as resp:
                     logger.info(f"🏓 Autoping OK — {ping_url} — status {resp.status}")
-        except Exception as e:
-            logger.warning(f"⚠️ Autoping falhou: {e}")
-        await asyncio.sleep(300)  # 5 minutos
+            except Exception as e:
+                logger.warning(f"⚠️ Autoping falhou: {e}")
+            await asyncio.sleep(300)  # 5 minutos
 
 # ── Bot ───────────────────────────────────────────────────────────────
 
+AUTO_SETUP_TIMEOUT = 60  # segundos por cog
+
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
@@ -55,10 +51,34 @@ intents.guilds = True
 
 class NatanBot(commands.Bot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
+        # http_trace conta cada chamada HTTP ao Discord (e os 429) para o /metrics
+        super().__init__(command_prefix="!", intents=intents, http_trace=trace_discord())
+        instrumentar_interacoes()
+        self._auto_setup_feitos = set()
+        self._auto_setup_lock = asyncio.Lock()
+        self.servidor_web = ServidorWeb(self)
+        self.servidor_web.coletores += [
+            lambda: linhas_de_stats("natan_agendador", agendador.stats()),
+            lambda: linhas_de_stats("natan_catalogo", catalogo.stats()),
+            lambda: linhas_de_stats("natan_downloads", downloads.stats()),
+            lambda: linhas_de_stats("natan_vitrine", vitrine.stats()),
+            metricas.texto,
+        ]
+        self.servidor_web.rotas.append(("GET", "/d/{item_id}/{token}", downloads.rota))
+        # Mudanças de estoque (NOTIFY do catálogo) atualizam as mensagens da loja e do Free
+        catalogo.ouvintes.append(vitrine.alterado)
+        self._autoping = None
 
     async def setup_hook(self):
-        init_db()
+        perfil.marcar("login")
+        agendador.iniciar()
+        with perfil.fase("init_pool"):
+            await init_pool()
+        with perfil.fase("init_db"):
+            await init_db()
+        with perfil.fase("catalogo"):
+            await catalogo.iniciar()
+        downloads.iniciar()
 
         cogs = [
             "cogs.regras", "cogs.anuncios", "cogs.apresentacoes",
@@ -67,16 +87,67 @@ class NatanBot(commands.Bot):
         ]
         for cog in cogs:
             try:
-                await self.load_extension(cog)
+                # Inclui o cog_load de cada cog (queries de carga do Suporte, etc.)
+                with perfil.fase(f"load_extension:{cog}"):
+                    await self.load_extension(cog)
                 logger.info(f"✅ Cog carregado: {cog}")
             except Exception as e:
                 logger.error(f"❌ Erro ao carregar {cog}: {e}")
 
-        await self.tree.sync()
-        logger.info("✅ Slash commands sincronizados!")
-        self.loop.create_task(autoping())
+        with perfil.fase("tree.sync"):
+            await self.sincronizar_comandos()
+        self._autoping = self.loop.create_task(autoping(self.servidor_web.porta))
+
+    def _assinatura_comandos(self, guild=None) -> str:
+        """Hash de tudo que o Discord recebe no sync (nomes, parâmetros, descrições, permissões)."""
+        payload = []
+        for cmd in self.tree.get_commands(guild=guild):
+            try:
+                payload.append(cmd.to_dict(self.tree))
+            except TypeError:  # discord.py < 2.4
+                payload.append(cmd.to_dict())
+        payload.sort(key=lambda c: c["name"])
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def sincronizar_comandos(self):
+        """Só chama tree.sync() quando os comandos mudaram desde o último sync."""
+        guild = discord.Object(id=GUILD_ID) if SYNC_SOMENTE_GUILD else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        chave = f"tree_hash:guild:{GUILD_ID}" if guild else "tree_hash:global"
+        assinatura = self._assinatura_comandos(guild)
+
+        row = await fetchone("SELECT valor FROM bot_estado WHERE chave = %s", (chave,))
+        if row and row["valor"] == assinatura and not SYNC_FORCAR:
+            logger.info("✅ Slash commands inalterados, sync ignorado.")
+            return
+
+        await self.tree.sync(guild=guild)
+        await execute(
+            "INSERT INTO bot_estado (chave, valor) VALUES (%s, %s) "
+            "ON CONFLICT (chave) DO UPDATE SET valor = EXCLUDED.valor, atualizado_em = CURRENT_TIMESTAMP",
+            (chave, assinatura)
+        )
+        logger.info(f"✅ Slash commands sincronizados ({'guild' if guild else 'global'})!")
+
+    async def close(self):
+        if self._autoping:
+            self._autoping.cancel()
+        await super().close()
+        await self.servidor_web.parar()
+        await catalogo.parar()
+        vitrine.parar()
+        await agendador.parar()
+        await downloads.parar()   # grava o que ainda está no buffer antes de fechar o pool
+        await close_pool()
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        # Marca a chegada da interação para medir o tempo até a primeira resposta (ver metricas.py)
+        marcar_recebida(interaction)
 
     async def on_ready(self):
+        if not perfil.concluido:
+            perfil.marcar("gateway até on_ready")
         logger.info(f"🤖 NatanSites Bot online como {self.user} (ID: {self.user.id})")
         await self.change_presence(
             activity=discord.Activity(
@@ -87,23 +158,69 @@ class NatanBot(commands.Bot):
         await self.auto_setup()
 
     async def auto_setup(self):
-        await asyncio.sleep(2)
-        guild = self.get_guild(GUILD_ID)
-        if not guild:
-            logger.error("❌ Guild não encontrada!")
+        # on_ready dispara de novo a cada reconexão: só roda o que ainda não deu certo
+        if self._auto_setup_lock.locked():
+            logger.info("ℹ️ Auto-setup já em andamento, ignorando novo on_ready.")
             return
-        logger.info("🔄 Iniciando auto-setup das mensagens fixas...")
-        for name, cog_obj in self.cogs.items():
-            if hasattr(cog_obj, "auto_setup"):
-                try:
-                    await cog_obj.auto_setup(guild)
-                except Exception as e:
-                    logger.error(f"Erro no auto_setup de {name}: {e}")
+        async with self._auto_setup_lock:
+            # Em qualquer saída (inclusive sem guild) o relatório de startup é fechado
+            try:
+                setups = [
+                    (name, cog_obj) for name, cog_obj in self.cogs.items()
+                    if hasattr(cog_obj, "auto_setup") and name not in self._auto_setup_feitos
+                ]
+                if not setups:
+                    logger.info("ℹ️ Auto-setup já executado, ignorando novo on_ready.")
+                    return
+                guild = self.get_guild(GUILD_ID)
+                if not guild:
+                    logger.error("❌ Guild não encontrada!")
+                    if not perfil.concluido:
+                        perfil.registrar("auto_setup", 0.0, "guild não encontrada")
+                    return
+                logger.info("🔄 Iniciando auto-setup das mensagens fixas...")
+                inicio = time.perf_counter()
+                resultados = await asyncio.gather(
+                    *(self._auto_setup_cog(name, cog_obj, guild) for name, cog_obj in setups)
+                )
+                resumo = ", ".join(f"{name} {status} {duracao:.2f}s" for name, status, duracao in resultados)
+                logger.info(f"✅ Auto-setup concluído em {time.perf_counter() - inicio:.2f}s — {resumo}")
+                self._auto_setup_feitos.update(name for name, status, _ in resultados if status == "ok")
+            finally:
+                perfil.concluir()
+
+    async def _auto_setup_cog(self, name: str, cog_obj, guild: discord.Guild):
+        """Roda o auto_setup de um cog isolado: timeout e erro não afetam os outros."""
+        inicio = time.perf_counter()
+        status = "ok"
+        try:
+            await asyncio.wait_for(cog_obj.auto_setup(guild), timeout=AUTO_SETUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            logger.error(f"⏱️ auto_setup de {name} passou de {AUTO_SETUP_TIMEOUT}s e foi cancelado.")
+        except Exception as e:
+            status = "erro"
+            logger.error(f"Erro no auto_setup de {name}: {e}")
+        duracao = time.perf_counter() - inicio
+        if not perfil.concluido:
+            perfil.registrar(f"auto_setup:{name}", duracao, status, inicio)
+        return name, status, duracao
 
 
 bot = NatanBot()
 
+
+async def main():
+    async with bot:
+        # O servidor web sobe antes do login: o Render checa a porta logo no deploy,
+        # e um login lento (ou com rate limit) não pode derrubar essa checagem
+        with perfil.fase("servidor_web"):
+            await bot.servidor_web.iniciar()
+        await bot.start(BOT_TOKEN)
+
+
 if __name__ == "__main__":
-    t = threading.Thread(target=iniciar_servidor_web, daemon=True)
-    t.start()
-    bot.run(BOT_TOKEN)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
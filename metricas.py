@@ -0,0 +1,250 @@
+# ============================================================
+#   metricas.py — Registro de métricas no formato texto do Prometheus
+#   Contadores, gauges e histogramas simples (sem dependência extra),
+#   expostos em /metrics pelo servidor_web.py.
+#     - tempo até a primeira resposta de cada slash command / botão
+#     - consultas ao banco (quantidade e duração por nome)
+#     - chamadas HTTP ao Discord e 429 recebidos
+# ============================================================
+import logging
+import math
+import time
+import aiohttp
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Limite de 3 s do Discord para responder (ou deferir) uma interação
+BUCKETS_INTERACAO = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0, 5.0, 10.0)
+BUCKETS_DB        = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Prefixos de custom_id dos botões (os dinâmicos levam o ID do item depois do prefixo).
+# Qualquer outro componente (paginação etc., IDs aleatórios) entra como "outro".
+PREFIXOS_BOTOES = ("carrinho_btn_", "free_btn_", "chamar_suporte_btn", "fechar_ticket_btn", "zoacao_btn")
+
+
+def _rotulos(nomes: tuple, valores: tuple) -> str:
+    if not nomes:
+        return ""
+    pares = ",".join(f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores))
+    return "{" + pares + "}"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._valores = {}
+
+    def inc(self, *valores, quanto: float = 1):
+        self._valores[valores] = self._valores.get(valores, 0) + quanto
+
+    def linhas(self) -> list:
+        return [f"{self.nome}{_rotulos(self.rotulos, v)} {_numero(n)}" for v, n in sorted(self._valores.items())]
+
+
+class Gauge:
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), funcao=None):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.funcao = funcao      # se definida, o valor é lido na hora da coleta
+        self._valores = {}
+
+    def set(self, valor: float, *valores):
+        self._valores[valores] = valor
+
+    def linhas(self) -> list:
+        if self.funcao is not None:
+            return [f"{self.nome} {_numero(self.funcao())}"]
+        return [f"{self.nome}{_rotulos(self.rotulos, v)} {_numero(n)}" for v, n in sorted(self._valores.items())]
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: tuple = (), buckets: tuple = BUCKETS_DB):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}         # valores dos rótulos -> [contagens por bucket, soma, total]
+
+    def observar(self, segundos: float, *valores):
+        serie = self._series.get(valores)
+        if serie is None:
+            serie = self._series[valores] = [[0] * len(self.buckets), 0.0, 0]
+        for i, limite in enumerate(self.buckets):
+            if segundos <= limite:
+                serie[0][i] += 1
+                break
+        serie[1] += segundos
+        serie[2] += 1
+
+    def linhas(self) -> list:
+        linhas = []
+        for valores, (contagens, soma, total) in sorted(self._series.items()):
+            acumulado = 0
+            for limite, n in zip(self.buckets, contagens):
+                acumulado += n
+                rot = _rotulos(self.rotulos + ("le",), valores + (_numero(limite),))
+                linhas.append(f"{self.nome}_bucket{rot} {acumulado}")
+            rot = _rotulos(self.rotulos, valores)
+            linhas.append(f"{self.nome}_sum{rot} {_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rot} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas = {}
+
+    def _registrar(self, metrica):
+        existente = self._metricas.get(metrica.nome)
+        if existente is not None:
+            return existente
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: tuple = ()) -> Contador:
+        return self._registrar(Contador(nome, ajuda, rotulos))
+
+    def gauge(self, nome: str, ajuda: str, rotulos: tuple = (), funcao=None) -> Gauge:
+        gauge = self._registrar(Gauge(nome, ajuda, rotulos))
+        if funcao is not None:
+            gauge.funcao = funcao
+        return gauge
+
+    def histograma(self, nome: str, ajuda: str, rotulos: tuple = (), buckets: tuple = BUCKETS_DB) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def texto(self) -> list:
+        """Linhas no formato de exposição texto (usado como coletor do /metrics)."""
+        linhas = []
+        for metrica in self._metricas.values():
+            try:
+                corpo = metrica.linhas()
+            except Exception as e:
+                logger.error(f"Erro ao coletar a métrica {metrica.nome}: {e}")
+                continue
+            linhas.append(f"# HELP {metrica.nome} {metrica.ajuda}")
+            linhas.append(f"# TYPE {metrica.nome} {metrica.tipo}")
+            linhas.extend(corpo)
+        return linhas
+
+
+metricas = RegistroMetricas()
+
+# ── Métricas do bot ──────────────────────────────────────────────────
+
+tempo_resposta = metricas.histograma(
+    "natan_interacao_primeira_resposta_seconds",
+    "Tempo entre receber a interação e a primeira resposta (ou defer).",
+    ("tipo", "nome"), BUCKETS_INTERACAO,
+)
+db_consultas = metricas.contador(
+    "natan_db_consultas_total", "Consultas ao banco por nome.", ("consulta", "resultado"),
+)
+db_duracao = metricas.histograma(
+    "natan_db_consulta_seconds", "Duração das consultas ao banco (inclui espera pelo pool).",
+    ("consulta",), BUCKETS_DB,
+)
+discord_http = metricas.contador(
+    "natan_discord_http_total", "Chamadas HTTP à API do Discord.", ("metodo", "status"),
+)
+discord_429 = metricas.contador(
+    "natan_discord_rate_limit_total", "Respostas 429 da API do Discord por escopo.", ("escopo",),
+)
+
+# ── Interações ───────────────────────────────────────────────────────
+
+def rotulo_interacao(interaction: discord.Interaction):
+    """(tipo, nome) da interação; botões dinâmicos são agrupados pelo prefixo do custom_id."""
+    if interaction.type == discord.InteractionType.application_command:
+        return "comando", (interaction.data or {}).get("name", "?")
+    if interaction.type == discord.InteractionType.component:
+        custom_id = (interaction.data or {}).get("custom_id", "")
+        for prefixo in PREFIXOS_BOTOES:
+            if custom_id.startswith(prefixo):
+                return "botao", prefixo
+        return "botao", "outro"
+    return None
+
+
+def marcar_recebida(interaction: discord.Interaction):
+    """Chamado no on_interaction: guarda o instante de chegada (relógio local)."""
+    interaction.extras.setdefault("recebida_em", time.perf_counter())
+
+
+def _observar_resposta(interaction: discord.Interaction):
+    if interaction.extras.get("respondida"):
+        return
+    interaction.extras["respondida"] = True
+    rotulo = rotulo_interacao(interaction)
+    if rotulo is None:
+        return
+    recebida = interaction.extras.get("recebida_em")
+    if recebida is not None:
+        segundos = time.perf_counter() - recebida
+    else:
+        # on_interaction ainda não rodou: usa o timestamp do snowflake da interação
+        segundos = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    tempo_resposta.observar(max(0.0, segundos), *rotulo)
+
+
+def instrumentar_interacoes():
+    """Mede a primeira resposta envolvendo os métodos de InteractionResponse (uma vez só)."""
+    if getattr(discord.InteractionResponse, "_natan_metricas", False):
+        return
+    for nome in ("defer", "send_message", "edit_message", "send_modal"):
+        original = getattr(discord.InteractionResponse, nome, None)
+        if original is None:
+            continue
+
+        def envolver(original):
+            async def medido(self, *args, **kwargs):
+                try:
+                    return await original(self, *args, **kwargs)
+                finally:
+                    _observar_resposta(self._parent)
+            medido.__name__ = original.__name__
+            medido.__doc__ = original.__doc__
+            return medido
+
+        setattr(discord.InteractionResponse, nome, envolver(original))
+    discord.InteractionResponse._natan_metricas = True
+
+
+# ── HTTP do Discord ──────────────────────────────────────────────────
+
+def trace_discord() -> aiohttp.TraceConfig:
+    """TraceConfig passado ao Client (http_trace): conta cada chamada e cada 429."""
+    trace = aiohttp.TraceConfig()
+
+    async def fim(session, contexto, params):
+        status = params.response.status
+        discord_http.inc(params.method, str(status))
+        if status == 429:
+            discord_429.inc(params.response.headers.get("X-RateLimit-Scope", "desconhecido"))
+
+    async def erro(session, contexto, params):
+        discord_http.inc(params.method, "erro")
+
+    trace.on_request_end.append(fim)
+    trace.on_request_exception.append(erro)
+    return trace
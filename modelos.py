@@ -0,0 +1,152 @@
+# ============================================================
+#   modelos.py — Embeds e views fixos montados uma única vez
+#   Cada embed estático é construído e serializado (to_dict) uma vez
+#   por guild; a cada envio só se faz uma cópia rasa para carimbar o
+#   timestamp, que é sobreposto no payload já pronto (outras mudanças
+#   na cópia caem na serialização normal). As views são
+#   instâncias únicas (os componentes delas ainda são gerados pelo
+#   discord.py a cada envio — são poucos botões).
+# ============================================================
+import copy
+import datetime
+import logging
+import discord
+from fixas import hash_conteudo
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedPronto(discord.Embed):
+    """Embed cujo payload foi serializado uma única vez.
+
+    to_dict() devolve uma cópia rasa desse payload com o timestamp atual,
+    sem refazer a serialização de campos, autor, rodapé etc. Qualquer outra
+    alteração (add_field, set_thumbnail, description...) descarta o payload
+    desta instância, que volta à serialização normal do discord.py; a lista
+    de campos é copiada antes de ser alterada, então a base em cache nunca
+    muda através de uma cópia.
+    """
+    __slots__ = ("_payload",)
+
+    @classmethod
+    def de(cls, embed: discord.Embed) -> "EmbedPronto":
+        payload = embed.to_dict()
+        payload.pop("timestamp", None)
+        pronto = cls.from_dict(payload)
+        pronto._payload = payload
+        return pronto
+
+    def __copy__(self):
+        # Copia os slots direto, sem passar pelo __setattr__ (que descartaria o payload)
+        nova = type(self).__new__(type(self))
+        for nome in discord.Embed.__slots__ + EmbedPronto.__slots__:
+            if hasattr(self, nome):
+                object.__setattr__(nova, nome, getattr(self, nome))
+        return nova
+
+    def __setattr__(self, nome, valor):
+        if nome not in ("_payload", "_timestamp", "timestamp"):
+            object.__setattr__(self, "_payload", None)
+        super().__setattr__(nome, valor)
+
+    def __delattr__(self, nome):
+        object.__setattr__(self, "_payload", None)
+        super().__delattr__(nome)
+
+    def _soltar_campos(self):
+        """Copia a lista de campos (compartilhada com a base) antes de alterá-la."""
+        campos = getattr(self, "_fields", None)
+        self._fields = [dict(c) for c in campos] if campos is not None else []
+
+    def add_field(self, *args, **kwargs):
+        self._soltar_campos()
+        return super().add_field(*args, **kwargs)
+
+    def insert_field_at(self, *args, **kwargs):
+        self._soltar_campos()
+        return super().insert_field_at(*args, **kwargs)
+
+    def set_field_at(self, *args, **kwargs):
+        self._soltar_campos()
+        return super().set_field_at(*args, **kwargs)
+
+    def remove_field(self, *args, **kwargs):
+        self._soltar_campos()
+        return super().remove_field(*args, **kwargs)
+
+    def clear_fields(self):
+        self._fields = []
+        return self
+
+    def to_dict(self) -> dict:
+        if getattr(self, "_payload", None) is None:
+            return super().to_dict()
+        payload = dict(self._payload)
+        if self.timestamp is not None:
+            ts = self.timestamp
+            ts = ts.astimezone(datetime.timezone.utc) if ts.tzinfo else ts.replace(tzinfo=datetime.timezone.utc)
+            payload["timestamp"] = ts.isoformat()
+        return payload
+
+
+class RegistroModelos:
+    def __init__(self):
+        self._construtores = {}   # nome -> função(guild) que monta o embed
+        self._embeds = {}         # (nome, guild_id) -> EmbedPronto
+        self._hashes = {}         # (nome, guild_id) -> hash do payload da mensagem fixa
+        self._views = {}          # nome -> instância única da view persistente
+        self.construcoes = 0
+        self.reusos = 0
+
+    def registrar(self, nome: str, construtor):
+        self._construtores[nome] = construtor
+        self.invalidar(nome)
+
+    def registrar_view(self, nome: str, view: discord.ui.View) -> discord.ui.View:
+        self._views[nome] = view
+        return view
+
+    def view(self, nome: str) -> discord.ui.View:
+        return self._views[nome]
+
+    def base(self, nome: str, guild: discord.Guild = None) -> discord.Embed:
+        """Embed compartilhado — não altere o objeto devolvido."""
+        chave = (nome, guild.id if guild else None)
+        embed = self._embeds.get(chave)
+        if embed is None:
+            embed = EmbedPronto.de(self._construtores[nome](guild))
+            self._embeds[chave] = embed
+            self.construcoes += 1
+        else:
+            self.reusos += 1
+        return embed
+
+    def embed(self, nome: str, guild: discord.Guild = None, carimbar: bool = True) -> discord.Embed:
+        """Embed pronto para envio; com `carimbar`, uma cópia rasa com o timestamp de agora."""
+        embed = self.base(nome, guild)
+        if not carimbar:
+            return embed
+        embed = copy.copy(embed)
+        embed.timestamp = discord.utils.utcnow()
+        return embed
+
+    def hash(self, nome: str, guild: discord.Guild = None, content: str = None, view: str = None) -> str:
+        """Hash (cacheado) do payload da mensagem fixa montada com este modelo."""
+        chave = (nome, guild.id if guild else None)
+        valor = self._hashes.get(chave)
+        if valor is None:
+            valor = hash_conteudo(content, self.base(nome, guild), self._views[view] if view else None)
+            self._hashes[chave] = valor
+        return valor
+
+    def invalidar(self, nome: str = None, guild_id: int = None):
+        for cache in (self._embeds, self._hashes):
+            for chave in [c for c in cache if (nome is None or c[0] == nome) and (guild_id is None or c[1] == guild_id)]:
+                del cache[chave]
+
+    def stats(self) -> dict:
+        return {"modelos": len(self._construtores), "em_cache": len(self._embeds),
+                "construcoes": self.construcoes, "reusos": self.reusos}
+
+
+modelos = RegistroModelos()
@@ -0,0 +1,82 @@
+# ============================================================
+#   perfil.py — Tempos de cada fase do startup do bot
+#   Importe este módulo ANTES de qualquer outro no main.py para
+#   que o tempo de import também entre no relatório.
+#   Com --profile-startup, o startup inteiro roda sob cProfile e
+#   o resultado vai para startup.prof + top 25 no log.
+# ============================================================
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ARQUIVO = "startup.prof"
+
+
+class PerfilStartup:
+    def __init__(self):
+        self.origem = time.perf_counter()
+        self.fases = []
+        self.concluido = False
+        self.total = None
+        self._ultima_marca = self.origem
+        self._profiler = None
+        if "--profile-startup" in sys.argv:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def registrar(self, nome: str, duracao: float, status: str = "ok", inicio: float = None):
+        inicio = (inicio if inicio is not None else time.perf_counter() - duracao) - self.origem
+        self.fases.append({"fase": nome, "inicio": round(inicio, 4), "duracao": round(duracao, 4), "status": status})
+
+    def marcar(self, nome: str):
+        """Registra o tempo desde a marca anterior (ou desde o início do processo)."""
+        agora = time.perf_counter()
+        self.registrar(nome, agora - self._ultima_marca, inicio=self._ultima_marca)
+        self._ultima_marca = agora
+
+    @contextmanager
+    def fase(self, nome: str):
+        inicio = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "erro"
+            raise
+        finally:
+            fim = time.perf_counter()
+            self.registrar(nome, fim - inicio, status, inicio)
+            self._ultima_marca = fim
+
+    def concluir(self):
+        if self.concluido:
+            return
+        self.concluido = True
+        self.total = round(time.perf_counter() - self.origem, 4)
+        linhas = "\n".join(
+            f"   {f['fase']:<32} {f['duracao']:>8.3f}s  (+{f['inicio']:.3f}s) {'' if f['status'] == 'ok' else f['status']}"
+            for f in self.fases
+        )
+        logger.info(f"⏱️ Startup concluído em {self.total:.3f}s:\n{linhas}")
+        if self._profiler:
+            self._despejar_profile()
+
+    def relatorio(self) -> dict:
+        return {"concluido": self.concluido, "total": self.total, "fases": list(self.fases)}
+
+    def _despejar_profile(self):
+        self._profiler.disable()
+        self._profiler.dump_stats(PROFILE_ARQUIVO)
+        saida = io.StringIO()
+        pstats.Stats(self._profiler, stream=saida).sort_stats("cumulative").print_stats(25)
+        logger.info(f"🔬 cProfile do startup salvo em {PROFILE_ARQUIVO}:\n{saida.getvalue()}")
+        self._profiler = None
+
+
+perfil = PerfilStartup()
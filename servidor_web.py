@@ -0,0 +1,125 @@
+# ============================================================
+#   servidor_web.py — Servidor HTTP embutido (Render precisa de porta aberta)
+#   Roda no mesmo event loop do bot (aiohttp), sem thread extra.
+#     /         → texto simples (ping do Render / autoping)
+#     /health   → vivo? latência do gateway, pool do banco, lag do loop
+#     /ready    → 200 só depois do startup completo
+#     /metrics  → métricas em texto (formato Prometheus)
+#     + rotas extras registradas pelos módulos (ex.: /d/... do downloads.py)
+# ============================================================
+import asyncio
+import logging
+import math
+import os
+import time
+from aiohttp import web
+from database import pool_status
+from perfil import perfil
+
+logger = logging.getLogger(__name__)
+
+PORTA_WEB          = int(os.environ.get("PORT", "8080"))
+LAG_INTERVALO      = 1.0   # segundos entre as medições de lag do event loop
+
+
+def linhas_de_stats(prefixo: str, stats: dict) -> list:
+    """Converte um dict de stats (valores numéricos/bool) em gauges no formato texto."""
+    linhas = []
+    for nome, valor in stats.items():
+        if isinstance(valor, bool):
+            valor = int(valor)
+        if isinstance(valor, (int, float)):
+            linhas.append(f"# TYPE {prefixo}_{nome} gauge")
+            linhas.append(f"{prefixo}_{nome} {valor}")
+    return linhas
+
+
+class ServidorWeb:
+    def __init__(self, bot, porta: int = PORTA_WEB):
+        self.bot = bot
+        self.porta = porta
+        self.lag_atual = 0.0
+        self.lag_max = 0.0
+        self._runner = None
+        self._monitor = None
+        # Funções que devolvem linhas extras para o /metrics (ver métricas dos cogs)
+        self.coletores = []
+        # Rotas extras (método, caminho, handler), registradas antes de iniciar()
+        self.rotas = []
+
+    async def iniciar(self):
+        app = web.Application()
+        app.router.add_get("/", self.raiz)
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/ready", self.ready)
+        app.router.add_get("/metrics", self.metrics)
+        for metodo, caminho, handler in self.rotas:
+            app.router.add_route(metodo, caminho, handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.porta).start()
+        self._monitor = asyncio.get_running_loop().create_task(self._medir_lag())
+        logger.info(f"🌐 Servidor web interno iniciado na porta {self.porta}")
+
+    async def parar(self):
+        if self._monitor:
+            self._monitor.cancel()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _medir_lag(self):
+        """Quanto o loop atrasa para acordar de um sleep: mede handlers bloqueando o loop."""
+        while True:
+            inicio = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVALO)
+            self.lag_atual = max(0.0, time.perf_counter() - inicio - LAG_INTERVALO)
+            self.lag_max = max(self.lag_max, self.lag_atual)
+
+    def _latencia(self):
+        latencia = self.bot.latency
+        return None if latencia is None or math.isinf(latencia) or math.isnan(latencia) else latencia
+
+    # ── Rotas ────────────────────────────────────────────────────────
+
+    async def raiz(self, request: web.Request):
+        return web.Response(text="NatanSites Bot - Online!")
+
+    async def health(self, request: web.Request):
+        vivo = not self.bot.is_closed()
+        latencia = self._latencia()
+        corpo = {
+            "status": "online" if vivo else "fechado",
+            "gateway_latencia_ms": round(latencia * 1000, 1) if latencia is not None else None,
+            "loop_lag_ms": round(self.lag_atual * 1000, 1),
+            "loop_lag_max_ms": round(self.lag_max * 1000, 1),
+            "db_pool": pool_status(),
+            "startup": perfil.relatorio(),
+        }
+        return web.json_response(corpo, status=200 if vivo else 503)
+
+    async def ready(self, request: web.Request):
+        pronto = self.bot.is_ready() and perfil.concluido and pool_status()["iniciado"]
+        return web.json_response({"pronto": pronto}, status=200 if pronto else 503)
+
+    async def metrics(self, request: web.Request):
+        latencia = self._latencia()
+        pool = pool_status()
+        linhas = [
+            "# TYPE natan_gateway_latency_seconds gauge",
+            f"natan_gateway_latency_seconds {latencia if latencia is not None else 'NaN'}",
+            "# TYPE natan_loop_lag_seconds gauge",
+            f"natan_loop_lag_seconds {self.lag_atual}",
+            "# TYPE natan_db_pool_in_use gauge",
+            f"natan_db_pool_in_use {pool['em_uso']}",
+            "# TYPE natan_db_pool_waiting gauge",
+            f"natan_db_pool_waiting {pool['esperando']}",
+            "# TYPE natan_db_pool_max gauge",
+            f"natan_db_pool_max {pool['max']}",
+        ]
+        for coletor in self.coletores:
+            try:
+                linhas.extend(coletor())
+            except Exception as e:
+                logger.error(f"Erro ao coletar métricas: {e}")
+        return web.Response(text="\n".join(linhas) + "\n", content_type="text/plain", charset="utf-8")
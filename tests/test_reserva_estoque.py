@@ -0,0 +1,60 @@
+# ============================================================
+#   test_reserva_estoque.py — Cliques simultâneos no botão do
+#   carrinho contra um PostgreSQL de verdade: o estoque nunca pode
+#   ser vendido duas vezes.
+#
+#   Uso:  DATABASE_URL=postgresql://... python -m pytest tests
+#   (sem DATABASE_URL o teste é pulado)
+# ============================================================
+import asyncio
+import os
+import pytest
+
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("DATABASE_URL não definida (precisa de um PostgreSQL local).", allow_module_level=True)
+
+pytest.importorskip("discord")
+pytest.importorskip("psycopg2")
+
+os.environ.setdefault("TOKEN", "teste")                # config.py exige o token
+os.environ.setdefault("DB_ACQUIRE_TIMEOUT", "60")      # centenas de cliques esperando 10 conexões
+
+import database
+from cogs.loja import reservar_produto, RESERVA_OK, RESERVA_ESGOTADO
+
+PRODUTO_ID = "prod_teste_concorrencia"
+ESTOQUE = 25
+CLIQUES = 400
+
+
+async def _cenario():
+    await database.init_pool()
+    try:
+        await database.init_db()
+        await database.execute("DELETE FROM carrinho WHERE produto_id = %s", (PRODUTO_ID,))
+        await database.execute(
+            "INSERT INTO produtos (id, nome, descricao, valor_centavos, estoque) VALUES (%s, %s, %s, %s, %s) "
+            "ON CONFLICT (id) DO UPDATE SET estoque = EXCLUDED.estoque",
+            (PRODUTO_ID, "Produto de teste", "Concorrência", 1000, ESTOQUE)
+        )
+        resultados = await asyncio.gather(
+            *(reservar_produto(f"usuario_{i}", PRODUTO_ID) for i in range(CLIQUES))
+        )
+        produto = await database.fetchone("SELECT estoque FROM produtos WHERE id = %s", (PRODUTO_ID,))
+        carrinho = await database.fetchone(
+            "SELECT COUNT(*) AS n FROM carrinho WHERE produto_id = %s", (PRODUTO_ID,)
+        )
+        return resultados, produto["estoque"], carrinho["n"]
+    finally:
+        await database.execute("DELETE FROM carrinho WHERE produto_id = %s", (PRODUTO_ID,))
+        await database.execute("DELETE FROM produtos WHERE id = %s", (PRODUTO_ID,))
+        await database.close_pool()
+
+
+def test_cliques_simultaneos_nao_vendem_alem_do_estoque():
+    resultados, estoque, reservas = asyncio.run(_cenario())
+
+    assert estoque == 0
+    assert reservas == ESTOQUE
+    assert resultados.count(RESERVA_OK) == ESTOQUE
+    assert resultados.count(RESERVA_ESGOTADO) == CLIQUES - ESTOQUE
@@ -0,0 +1,95 @@
+# ============================================================
+#   vitrine.py — Estoque ao vivo nas mensagens da loja e do Free
+#   Cada mudança de estoque chega pelo NOTIFY do catálogo; as edições
+#   são agrupadas por mensagem (no máximo uma a cada ESTOQUE_INTERVALO
+#   segundos, com o valor mais recente) e, com o estoque zerado, o
+#   botão é desativado para os cliques nem chegarem ao bot.
+# ============================================================
+import asyncio
+import logging
+import os
+import time
+import discord
+from catalogo import catalogo
+from envios import agendador, PRIORIDADE_MANUTENCAO
+
+logger = logging.getLogger(__name__)
+
+ESTOQUE_INTERVALO = float(os.environ.get("ESTOQUE_INTERVALO", "5"))   # segundos entre edições da mesma mensagem
+ESTOQUE_ATRASO    = 0.5   # espera mínima para juntar cliques quase simultâneos
+
+
+class VitrineEstoque:
+    def __init__(self):
+        self._tipos = {}           # tabela -> (bot, canal_id, construir(item_id, row) -> (embed, view))
+        self._pendentes = {}       # (tabela, item_id) -> task da próxima edição
+        self._ultima_edicao = {}   # (tabela, item_id) -> time.monotonic()
+        self._exibido = {}         # (tabela, item_id) -> estoque mostrado na mensagem
+        self.edicoes = 0
+        self.agrupadas = 0
+        self.ignoradas = 0
+
+    def registrar(self, bot, tabela: str, canal_id: int, construir):
+        self._tipos[tabela] = (bot, canal_id, construir)
+
+    def remover(self, tabela: str):
+        self._tipos.pop(tabela, None)
+
+    def exibido(self, tabela: str, item_id: str, estoque):
+        """Informa o estoque que acabou de ser postado (evita editar a mensagem recém-enviada)."""
+        self._exibido[(tabela, item_id)] = estoque
+
+    def alterado(self, tabela: str, item_id: str, op: str):
+        """Ouvinte do catálogo: agenda a edição da mensagem, se ainda não houver uma pendente."""
+        if tabela not in self._tipos or op == "DELETE":
+            self._exibido.pop((tabela, item_id), None)
+            return
+        chave = (tabela, item_id)
+        if chave in self._pendentes:
+            self.agrupadas += 1
+            return
+        espera = max(ESTOQUE_ATRASO, self._ultima_edicao.get(chave, 0) + ESTOQUE_INTERVALO - time.monotonic())
+        self._pendentes[chave] = asyncio.get_running_loop().create_task(self._atualizar(chave, espera))
+
+    def stats(self) -> dict:
+        return {"pendentes": len(self._pendentes), "edicoes": self.edicoes,
+                "agrupadas": self.agrupadas, "ignoradas": self.ignoradas}
+
+    def parar(self):
+        for task in self._pendentes.values():
+            task.cancel()
+        self._pendentes.clear()
+
+    async def _atualizar(self, chave: tuple, espera: float):
+        await asyncio.sleep(espera)
+        # A partir daqui, novas mudanças agendam a próxima edição
+        self._pendentes.pop(chave, None)
+        tabela, item_id = chave
+        try:
+            tipo = self._tipos.get(tabela)
+            row = await catalogo.get(tabela, item_id)
+            if tipo is None or not row or not row["msg_id"]:
+                return
+            if self._exibido.get(chave, object()) == row["estoque"]:
+                self.ignoradas += 1   # mudou outra coluna, ou o estoque voltou ao que já está na tela
+                return
+            bot, canal_id, construir = tipo
+            canal = bot.get_channel(canal_id)
+            if canal is None:
+                return
+            embed, view = construir(item_id, row)
+            msg = canal.get_partial_message(row["msg_id"])
+            self._ultima_edicao[chave] = time.monotonic()
+            await agendador.enviar(
+                canal.id, lambda: msg.edit(embed=embed, view=view),
+                PRIORIDADE_MANUTENCAO, f"estoque {item_id}"
+            )
+            self._exibido[chave] = row["estoque"]
+            self.edicoes += 1
+        except discord.NotFound:
+            logger.info(f"ℹ️ Mensagem de {item_id} não existe mais; estoque não atualizado.")
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o estoque exibido de {item_id}: {e}")
+
+
+vitrine = VitrineEstoque()